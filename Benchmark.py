@@ -0,0 +1,356 @@
+"""
+Benchmark and correctness regression suite for the hand evaluators and the simulator.
+
+Measures HandIdentifier and Evaluator hands/sec, Simulation trials/sec at
+1/3/6/9 opponents and memory per trial, and writes the results as JSON so runs
+on different commits can be compared with --compare.
+
+The exhaustive check walks all 2,598,960 five-card hands and compares both
+evaluators with an independent classification from rank counts and suits
+(referenceHand): its type counts must match the known totals, both evaluators
+must agree with its type, hands it ranks equal must have equal strength and
+compare equal under HandIdentifier.__eq__, and HandIdentifier.__gt__/__eq__
+must order hands as it does. HandIdentifier.mainHand is checked against a
+brute-force best five cards on one hand of every rank and on random
+seven-card hands.
+
+The range check deals hands from overlapping opponent ranges and compares
+the frequency of every combination of ranged hands with its exact probability.
+"""
+
+from collections import Counter
+from itertools import combinations, product
+from math import prod, sqrt
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from Card import cardsByIndex
+from Evaluator import evaluate, evaluateIndices, evaluateBatch, handTypeOf
+from HandIdentifier import HandIdentifier, HandType
+from HandRange import HandRange
+from Simulation import Simulation
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Number of five-card hands of each type out of the 2,598,960 possible
+fiveCardTypeCounts = {
+    HandType.HIGH_CARD: 1302540,
+    HandType.PAIR: 1098240,
+    HandType.TWO_PAIR: 123552,
+    HandType.THREE_OF_A_KIND: 54912,
+    HandType.STRAIGHT: 10200,
+    HandType.FLUSH: 5108,
+    HandType.FULL_HOUSE: 3744,
+    HandType.FOUR_OF_A_KIND: 624,
+    HandType.STRAIGHT_FLUSH: 36,
+    HandType.ROYAL_FLUSH: 4,
+}
+
+# Number of distinct five-card hand strengths
+numFiveCardStrengths = 7462
+
+benchOpps = [1, 3, 6, 9]
+
+# Opponent ranges whose hands share cards, for the range sampling check
+checkRanges = [
+    ['AA, KK', 'AA'],
+    ['AsAh, KsKh', 'AsAd'],
+    ['AA, KK:0.5, AKs', 'AA, AKs:0.25', 'KK, AKs'],
+    ['AA, KK', 'AA, KK', 'AA, KK:0.5', 'KK, AA:0.25'],
+]
+
+def randomHands(numHands: int, handSize: int, rng: random.Random) -> list[list[int]]:
+    """Returns numHands random hands of handSize distinct Card.index values."""
+    return [rng.sample(range(52), handSize) for _ in range(numHands)]
+
+def timeIt(function, *args) -> float:
+    """Returns the wall-clock seconds taken by one call of function."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def benchHandIdentifier(numHands: int, rng: random.Random) -> float:
+    """Returns HandIdentifier seven-card hands evaluated per second."""
+    hands = [[cardsByIndex[index] for index in hand] for hand in randomHands(numHands, 7, rng)]
+    return numHands / timeIt(lambda: [HandIdentifier(hand) for hand in hands])
+
+def benchEvaluator(numHands: int, rng: random.Random) -> dict:
+    """
+    Returns Evaluator seven-card hands evaluated per second, one by one and
+    batched, and batched from a NumPy array when NumPy is installed.
+    """
+    hands = randomHands(numHands, 7, rng)
+    evaluateBatch(hands[:1]) # Builds any lazy tables outside the timing
+    results = {
+        'evaluateIndices': numHands / timeIt(lambda: [evaluateIndices(hand) for hand in hands]),
+        'evaluateBatch': numHands / timeIt(evaluateBatch, hands),
+    }
+    if np is not None:
+        rows = np.array(hands, dtype=np.intp)
+        results['evaluateBatchArray'] = numHands / timeIt(evaluateBatch, rows)
+    return results
+
+def benchSimulation(numOpps: int, numSims: int, seed: int) -> dict:
+    """
+    Returns trials per second for runSim and runSims against numOpps random
+    opponents, and the peak bytes allocated per trial by runSims.
+    """
+    playerHand = [cardsByIndex[51], cardsByIndex[47]]
+
+    sim = Simulation(playerHand, numOpps=numOpps, seed=seed)
+    numSingle = max(1, numSims // 10)
+    runSimRate = numSingle / timeIt(lambda: [sim.runSim() for _ in range(numSingle)])
+
+    sim = Simulation(playerHand, numOpps=numOpps, seed=seed)
+    runSimsRate = numSims / timeIt(sim.runSims, numSims)
+
+    sim = Simulation(playerHand, numOpps=numOpps, seed=seed)
+    tracemalloc.start()
+    sim.runSims(numSims)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'runSimTrialsPerSec': runSimRate,
+        'runSimsTrialsPerSec': runSimsRate,
+        'runSimsPeakBytesPerTrial': peak / numSims,
+    }
+
+def referenceHand(hand: list[int]) -> tuple[HandType, list[int]]:
+    """
+    Classifies five Card.index values from their rank counts and suits alone,
+    independently of Evaluator and HandIdentifier. Returns the hand type and
+    the five rank values in the order they are compared: grouped by count and
+    then rank, with straights high to low and the wheel's ace last.
+    """
+    values = sorted((index // 4 + 2 for index in hand), reverse=True)
+    counts = Counter(values)
+    ordered = sorted(values, key=lambda value: (counts[value], value), reverse=True)
+    isFlush = len({index & 3 for index in hand}) == 1
+    isStraight = len(counts) == 5 and (values[0] - values[4] == 4 or values == [14, 5, 4, 3, 2])
+    if values == [14, 5, 4, 3, 2]:
+        ordered = [5, 4, 3, 2, 14]
+    groups = sorted(counts.values(), reverse=True)
+    if isStraight and isFlush:
+        handType = HandType.ROYAL_FLUSH if ordered[0] == 14 else HandType.STRAIGHT_FLUSH
+    elif groups[0] == 4:
+        handType = HandType.FOUR_OF_A_KIND
+    elif groups == [3, 2]:
+        handType = HandType.FULL_HOUSE
+    elif isFlush:
+        handType = HandType.FLUSH
+    elif isStraight:
+        handType = HandType.STRAIGHT
+    elif groups[0] == 3:
+        handType = HandType.THREE_OF_A_KIND
+    elif groups[:2] == [2, 2]:
+        handType = HandType.TWO_PAIR
+    elif groups[0] == 2:
+        handType = HandType.PAIR
+    else:
+        handType = HandType.HIGH_CARD
+    return handType, ordered
+
+def referenceKey(hand: list[int]) -> tuple[int, list[int]]:
+    """Returns a sort key for five Card.index values from referenceHand."""
+    handType, ordered = referenceHand(hand)
+    return handType.value, ordered
+
+def checkMainHand(identifier: HandIdentifier, hand: list[int], failures: list[str]) -> bool:
+    """
+    Checks that the lazily built mainHand of identifier is five of its cards
+    forming the best five-card hand of hand (by brute force over referenceKey),
+    listed in compared order, and that its type and strength agree.
+    Appends a failure description and returns False otherwise.
+    """
+    mainHand = identifier.getMainHand()
+    mainIndices = [card.index for card in mainHand]
+    bestType, bestOrder = referenceHand(max(combinations(hand, 5), key=referenceKey))
+    problem = None
+    if len(mainIndices) != 5 or len(set(mainIndices)) != 5 or not set(mainIndices) <= set(hand):
+        problem = "is not five of the hand's cards"
+    elif referenceHand(mainIndices) != (bestType, bestOrder):
+        problem = f"is not the best five cards ({bestType.name} {bestOrder})"
+    elif [card.getValue() for card in mainHand] != bestOrder:
+        problem = f"is not in compared order {bestOrder}"
+    elif identifier.getType() != bestType or evaluate(mainHand) != identifier.getStrength():
+        problem = "disagrees with the hand's type or strength"
+    if problem:
+        failures.append(f"mainHand {mainHand} of {[cardsByIndex[index] for index in hand]} {problem}")
+    return problem is None
+
+def checkFiveCardHands(numPairSamples: int, rng: random.Random) -> list[str]:
+    """
+    Runs the exhaustive five-card correctness check against the independent
+    referenceHand classification and returns a list of failure descriptions
+    (empty if everything passed). mainHand is checked for one hand of every
+    strength and for numPairSamples // 10 random seven-card hands.
+    """
+    failures = []
+    referenceCounts = {handType: 0 for handType in HandType}
+    representatives = {}
+    numTypeMismatches = numStrengthMismatches = numEqMismatches = 0
+
+    for hand in combinations(range(52), 5):
+        strength = evaluateIndices(hand)
+        key = referenceKey(hand)
+        referenceCounts[HandType(key[0])] += 1
+        identifier = HandIdentifier([cardsByIndex[index] for index in hand])
+        if identifier.getType().value != key[0] or handTypeOf(strength).value != key[0]:
+            numTypeMismatches += 1
+            if numTypeMismatches <= 10:
+                failures.append(f"{identifier} should be {HandType(key[0]).name}")
+        key = (key[0], tuple(key[1]))
+        representativeHand, representative = representatives.setdefault(key, (hand, identifier))
+        if representative is identifier:
+            continue
+        if strength != representative.getStrength():
+            numStrengthMismatches += 1
+            if numStrengthMismatches <= 10:
+                failures.append(f"{identifier} and {representative} rank the same but have different strengths")
+        elif not (identifier == representative):
+            numEqMismatches += 1
+            if numEqMismatches <= 10:
+                failures.append(f"{identifier} is not __eq__ to {representative} despite equal rank")
+
+    for name, count in (('type', numTypeMismatches), ('strength', numStrengthMismatches), ('__eq__', numEqMismatches)):
+        if count > 10:
+            failures.append(f"... {count} {name} mismatches in total")
+    for handType, expected in fiveCardTypeCounts.items():
+        if referenceCounts[handType] != expected:
+            failures.append(f"Reference found {referenceCounts[handType]} {handType.name} hands, expected {expected}")
+    if len(representatives) != numFiveCardStrengths:
+        failures.append(f"Reference found {len(representatives)} distinct hands, expected {numFiveCardStrengths}")
+
+    ordered = [representatives[key] for key in sorted(representatives)]
+    pairs = [(i, i + 1) for i in range(len(ordered) - 1)]
+    pairs += [tuple(sorted(rng.sample(range(len(ordered)), 2))) for _ in range(numPairSamples)]
+    numOrderErrors = 0
+    for low, high in pairs:
+        weaker, stronger = ordered[low][1], ordered[high][1]
+        if not (stronger > weaker) or weaker > stronger or weaker == stronger:
+            numOrderErrors += 1
+            if numOrderErrors <= 10:
+                failures.append(f"{stronger} should beat {weaker}")
+    if numOrderErrors > 10:
+        failures.append(f"... {numOrderErrors} ordering errors in total")
+
+    # mainHand is built lazily by the original classification code, so rebuild it from fresh identifiers
+    mainHands = [hand for hand, _ in ordered] + randomHands(numPairSamples // 10, 7, rng)
+    numMainHandErrors = 0
+    for hand in mainHands:
+        mainFailures = []
+        if not checkMainHand(HandIdentifier([cardsByIndex[index] for index in hand]), list(hand), mainFailures):
+            numMainHandErrors += 1
+            if numMainHandErrors <= 10:
+                failures += mainFailures
+    if numMainHandErrors > 10:
+        failures.append(f"... {numMainHandErrors} mainHand errors in total")
+    return failures
+
+def checkRangeSampling(numDeals: int, seed: int) -> list[str]:
+    """
+    Deals numDeals trials against each set of checkRanges, through both
+    runSim and runSims, and returns a failure for every combination of ranged
+    hands whose frequency is more than five standard errors from its exact
+    probability (the product of the hands' weights over all legal combinations).
+    """
+    failures = []
+    playerHand = [cardsByIndex[0], cardsByIndex[5]]
+    for rangeStrs in checkRanges:
+        sim = Simulation(playerHand, numOpps=len(rangeStrs), seed=seed, oppRanges=[HandRange(rangeStr) for rangeStr in rangeStrs])
+        # Per range: (combo, weight, mask) for every hand it can be dealt
+        choices = [
+            [(combo, weight - previous, mask) for combo, weight, previous, mask in zip(combos, cumWeights, [0.0] + cumWeights, masks)]
+            for combos, cumWeights, masks in sim.rangeCombos
+        ]
+        weights = {}
+        for picks in product(*choices):
+            if not any(first[2] & second[2] for first, second in combinations(picks, 2)):
+                weights[tuple(combo for combo, _, _ in picks)] = prod(weight for _, weight, _ in picks)
+        totalWeight = sum(weights.values())
+
+        counts = {key: 0 for key in weights}
+        for _ in range(numDeals):
+            sim.resetDeck()
+            sim.removeKnownCardsFromDeck()
+            hands = sim.drawRangeHands()
+            counts[tuple(tuple(sorted((card.index for card in hand), reverse=True)) for hand in hands)] += 1
+        deals = sim.dealTrials(numDeals)
+        trialSize = sim.dealSize
+        for trial in range(numDeals):
+            start = trial * trialSize + sim.numComDraws
+            counts[tuple(tuple(sorted(deals[j:j + 2], reverse=True)) for j in range(start, start + 2 * len(rangeStrs), 2))] += 1
+
+        numSamples = 2 * numDeals
+        for key, weight in weights.items():
+            probability = weight / totalWeight
+            if abs(counts[key] - numSamples * probability) > 5 * sqrt(numSamples * probability * (1 - probability)) + 1:
+                failures.append(f"Ranges {rangeStrs} dealt {key} {counts[key]} times in {numSamples}, expected {numSamples * probability:.1f}")
+    return failures
+
+def gitCommit() -> str:
+    """Returns the current git commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compareResults(previous: dict, current: dict, prefix: str = '') -> None:
+    """Prints the relative change of every numeric benchmark present in both results."""
+    for key, value in current.items():
+        if key not in previous or key == 'timestamp':
+            continue
+        if isinstance(value, dict):
+            compareResults(previous[key], value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and previous[key]:
+            print(f"{prefix}{key}: {previous[key]:.1f} -> {value:.1f} ({(value / previous[key] - 1) * 100:+.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and check the evaluators and simulator.")
+    parser.add_argument('--out', default='bench_output.json', help="file to write JSON results to")
+    parser.add_argument('--compare', help="earlier JSON results to compare against")
+    parser.add_argument('--hands', type=int, default=200000, help="hands per evaluator benchmark")
+    parser.add_argument('--sims', type=int, default=50000, help="trials per simulation benchmark")
+    parser.add_argument('--pair-samples', type=int, default=200000, help="random hand pairs in the ordering check")
+    parser.add_argument('--range-deals', type=int, default=20000, help="deals per path in the range sampling check")
+    parser.add_argument('--skip-check', action='store_true', help="skip the exhaustive five-card and range sampling checks")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    results = {
+        'commit': gitCommit(),
+        'python': platform.python_version(),
+        'timestamp': time.time(),
+        'handIdentifierHandsPerSec': benchHandIdentifier(args.hands // 10, rng),
+        'evaluatorHandsPerSec': benchEvaluator(args.hands, rng),
+        'simulation': {str(numOpps): benchSimulation(numOpps, args.sims, args.seed) for numOpps in benchOpps},
+    }
+    if not args.skip_check:
+        failures = checkFiveCardHands(args.pair_samples, rng)
+        results['checkFailures'] = failures
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        print(f"Five-card check: {'passed' if not failures else f'{len(failures)} failures'}")
+        rangeFailures = checkRangeSampling(args.range_deals, args.seed)
+        results['checkFailures'] += rangeFailures
+        for failure in rangeFailures:
+            print(f"FAIL: {failure}")
+        print(f"Range sampling check: {'passed' if not rangeFailures else f'{len(rangeFailures)} failures'}")
+
+    print(json.dumps(results, indent=2))
+    with open(args.out, 'w') as file:
+        json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compareResults(json.load(file), results)
+    if results.get('checkFailures'):
+        sys.exit(1)
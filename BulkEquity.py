@@ -0,0 +1,179 @@
+"""
+Command-line bulk equity: streams scenarios from a JSONL or CSV file through a
+process pool and writes one JSON result line per scenario, in input order.
+
+JSONL lines use the EquityServer query format:
+
+    {"id": "spot1", "hand": "AsKs", "board": "Qs7s2d", "opponents": ["QhQd"], "numOpps": 2}
+
+CSV files need a header row with the same column names. Known opponent hands
+are separated by ';' and ranges by '|', e.g. "QhQd;JcTc" and "TT+, AQs+|22+".
+
+Only a bounded window of scenarios is in flight, so memory stays constant for
+any input size. With --checkpoint, progress (input and output byte offsets) is
+saved every --checkpoint-every scenarios and a rerun resumes from it.
+With --cache-db, scenarios are looked up in and topped up into a persistent
+cache shared by all workers (see PersistentCache).
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import json
+import os
+from EquityServer import parseQuery, simulationResult
+from PersistentCache import PersistentCache
+from Simulation import Simulation
+
+def readScenarios(file, startOffset: int):
+    """
+    Yields (offset after the line, raw line) for every non-blank line of a
+    binary file, starting at startOffset.
+    """
+    file.seek(startOffset)
+    offset = startOffset
+    for line in file:
+        offset += len(line)
+        if line.strip():
+            yield offset, line
+
+def csvRowToQuery(line: str, header: list[str]) -> dict:
+    """
+    Converts one CSV line into a query dict, splitting the opponents column on
+    ';' and the ranges column on '|'. Empty columns are left out.
+    """
+    row = next(csv.reader([line]))
+    if len(row) != len(header):
+        raise ValueError(f"Expected {len(header)} columns, found {len(row)}")
+    query = {name: value.strip() for name, value in zip(header, row) if value.strip()}
+    if 'opponents' in query:
+        query['opponents'] = [hand for hand in query['opponents'].split(';') if hand.strip()]
+    if 'ranges' in query:
+        query['ranges'] = [rangeStr for rangeStr in query['ranges'].split('|') if rangeStr.strip()]
+    for name in ('numOpps', 'maxSims'):
+        if name in query:
+            query[name] = int(query[name])
+    return query
+
+def solveScenario(recordNumber: int, line: bytes, header: list[str], settings: dict) -> dict:
+    """
+    Worker entry point: parses one scenario line (CSV if header is given,
+    otherwise JSON), runs it to the requested precision and returns the result
+    line as a dict. Any error in a scenario is returned as an 'error' field
+    rather than raised, so one bad scenario never stops the run.
+    """
+    result = {'record': recordNumber}
+    try:
+        text = line.decode('utf-8')
+        body = csvRowToQuery(text, header) if header else json.loads(text)
+        if isinstance(body, dict) and 'id' in body:
+            result['id'] = body['id']
+        query = parseQuery(body)
+        sim = Simulation(query['playerHand'], query['knownComCards'], query['knownOppCards'], query['numOpps'], seed=settings['seed'] + recordNumber, oppRanges=query['oppRanges'])
+        maxSims = query['maxSims'] if query['maxSims'] is not None else settings['maxSims']
+        sim.runUntil(query['precision'], query['confidence'], settings['timeLimit'], maxSims, settings['batchSize'], cache=settings['cache'])
+    except Exception as error:
+        result['error'] = f"{type(error).__name__}: {error}"
+        return result
+    result.update(simulationResult(sim))
+    return result
+
+def loadCheckpoint(path: str) -> dict:
+    """Returns the saved checkpoint at path, or None if there is none."""
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+def saveCheckpoint(path: str, checkpoint: dict) -> None:
+    """Writes the checkpoint to a temporary file and renames it into place."""
+    tempPath = path + '.tmp'
+    with open(tempPath, 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(tempPath, path)
+
+def runBulk(inputPath: str, outputPath: str, checkpointPath: str = None, checkpointEvery: int = 1000, numWorkers: int = None, window: int = None, settings: dict = None, inputFormat: str = None) -> int:
+    """
+    Streams every scenario in inputPath through a process pool and appends the
+    results to outputPath in input order, resuming from checkpointPath if it
+    holds a checkpoint for the same files. At most window scenarios are in
+    flight at once. Returns the number of scenarios processed by this call.
+    """
+    settings = {'seed': 0, 'timeLimit': None, 'maxSims': 1000000, 'batchSize': 20000, 'cache': None, **(settings or {})}
+    numWorkers = numWorkers or os.cpu_count() or 1
+    window = window or numWorkers * 4
+    inputFormat = inputFormat or ('csv' if inputPath.lower().endswith('.csv') else 'jsonl')
+
+    checkpoint = loadCheckpoint(checkpointPath)
+    if checkpoint is not None and (checkpoint['input'] != os.path.abspath(inputPath) or checkpoint['output'] != os.path.abspath(outputPath)):
+        raise ValueError(f"Checkpoint {checkpointPath} belongs to a different input or output file")
+    records = checkpoint['records'] if checkpoint else 0
+    outputOffset = checkpoint['outputOffset'] if checkpoint else 0
+
+    with open(inputPath, 'rb') as inputFile, open(outputPath, 'r+b' if checkpoint else 'wb') as outputFile, ProcessPoolExecutor(max_workers=numWorkers) as executor:
+        header = None
+        startOffset = checkpoint['inputOffset'] if checkpoint else 0
+        if inputFormat == 'csv':
+            headerLine = inputFile.readline()
+            header = [name.strip() for name in next(csv.reader([headerLine.decode('utf-8')]))]
+            startOffset = max(startOffset, len(headerLine))
+        # Drop anything written after the last checkpoint; it is recomputed
+        outputFile.truncate(outputOffset)
+        outputFile.seek(outputOffset)
+
+        pending = deque()
+        processed = 0
+
+        def writeOldest() -> None:
+            nonlocal records, processed
+            inputOffset, future = pending.popleft()
+            outputFile.write(json.dumps(future.result()).encode('utf-8') + b'\n')
+            records += 1
+            processed += 1
+            if checkpointPath and records % checkpointEvery == 0:
+                outputFile.flush()
+                os.fsync(outputFile.fileno())
+                saveCheckpoint(checkpointPath, {
+                    'input': os.path.abspath(inputPath),
+                    'output': os.path.abspath(outputPath),
+                    'records': records,
+                    'inputOffset': inputOffset,
+                    'outputOffset': outputFile.tell(),
+                })
+
+        for inputOffset, line in readScenarios(inputFile, startOffset):
+            pending.append((inputOffset, executor.submit(solveScenario, records + len(pending), line, header, settings)))
+            if len(pending) >= window:
+                writeOldest()
+        while pending:
+            writeOldest()
+
+        if checkpointPath:
+            outputFile.flush()
+            saveCheckpoint(checkpointPath, {
+                'input': os.path.abspath(inputPath),
+                'output': os.path.abspath(outputPath),
+                'records': records,
+                'inputOffset': inputFile.tell(),
+                'outputOffset': outputFile.tell(),
+            })
+    return processed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute equity for every scenario in a JSONL or CSV file.")
+    parser.add_argument('input', help="scenario file (.jsonl or .csv)")
+    parser.add_argument('output', help="JSONL file to write results to")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="input format (default: from the file extension)")
+    parser.add_argument('--checkpoint', help="checkpoint file to save progress to and resume from")
+    parser.add_argument('--checkpoint-every', type=int, default=1000, help="scenarios between checkpoints")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--window', type=int, default=None, help="scenarios in flight at once (default: 4 per worker)")
+    parser.add_argument('--time-limit', type=float, default=None, help="simulation seconds allowed per scenario")
+    parser.add_argument('--max-sims', type=int, default=1000000, help="trials allowed per scenario unless it sets maxSims")
+    parser.add_argument('--seed', type=int, default=0, help="base random seed; scenario n uses seed + n")
+    parser.add_argument('--cache-db', help="SQLite file of cached results to reuse and top up")
+    args = parser.parse_args()
+    settings = {'seed': args.seed, 'timeLimit': args.time_limit, 'maxSims': args.max_sims, 'cache': PersistentCache(args.cache_db) if args.cache_db else None}
+    numProcessed = runBulk(args.input, args.output, args.checkpoint, args.checkpoint_every, args.workers, args.window, settings, args.format)
+    print(f"Processed {numProcessed} scenarios")
@@ -11,22 +11,65 @@ valueTable = {
             'J': 11,
             'Q': 12,
             'K': 13,
-            'A': 14, 
+            'A': 14,
 }
 
+# Rank and suit characters in the order used by the integer encodings below
+rankChars = '23456789TJQKA'
+suitChars = 'CDHS' # Clubs, Diamonds, Hearts, Spades
+
+# One prime per rank, so the product of a hand's primes identifies its ranks
+rankPrimes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+
 class Card():
     """
     Represents a single playing card with a rank and suit.
     Supports comparison operators and basic card utility methods.
+
+    There are exactly 52 Card instances. Constructing a card returns the
+    shared (interned) instance, so identical cards are the same object.
+
+    Each card carries two integer encodings:
+    - index: 0-51, computed as rankIndex * 4 + suitIndex
+    - packed: bits xxxbbbbb bbbbbbbb shdcrrrr xxpppppp, where b is the rank
+      bit, shdc the suit bit (clubs lowest), r the rank index and p the rank prime
     """
-    
-    def __init__(self, cardStr: str) -> None:
+
+    __slots__ = ('rank', 'suit', 'value', 'index', 'packed')
+
+    def __new__(cls, cardStr: str) -> 'Card':
         """
-        Initializes a card from a string like 'AS' (Ace of Spades).
+        Returns the card for a string like 'AS' (Ace of Spades).
         """
-        self.rank = cardStr[0]
-        self.suit = cardStr[1]
-        self.value = valueTable[self.rank]
+        card = cardsByStr.get(cardStr)
+        if card is None:
+            card = parseCard(cardStr)
+        return card
+
+    @classmethod
+    def _build(cls, rankIndex: int, suitIndex: int) -> 'Card':
+        """Creates the single instance for a rank and suit. Only used at import."""
+        card = object.__new__(cls)
+        card.rank = rankChars[rankIndex]
+        card.suit = suitChars[suitIndex]
+        card.value = rankIndex + 2
+        card.index = rankIndex * 4 + suitIndex
+        card.packed = (1 << (16 + rankIndex)) | (1 << (12 + suitIndex)) | (rankIndex << 8) | rankPrimes[rankIndex]
+        return card
+
+    @staticmethod
+    def fromInt(packed: int) -> 'Card':
+        """Returns the card for a packed integer as produced by toInt()."""
+        return cardsByIndex[((packed >> 8) & 0xF) * 4 + ((packed >> 12) & 0xF).bit_length() - 1]
+
+    @staticmethod
+    def fromIndex(index: int) -> 'Card':
+        """Returns the card for an index in the range 0-51."""
+        return cardsByIndex[index]
+
+    def toInt(self) -> int:
+        """Returns the packed integer encoding of the card."""
+        return self.packed
 
     def getSuit(self) -> str:
         """Returns the suit of the card (e.g., 'H', 'S')."""
@@ -44,29 +87,35 @@ class Card():
         if aceLow and self.value == 14:
             return 1
         return self.value
-    
+
     def __repr__(self) -> str:
         """Returns a string representation of the card."""
         return f"[{self.rank}{self.suit}]"
-    
+
+    def __reduce__(self):
+        """Pickles a card by its string so unpickling returns the interned instance."""
+        return (Card, (self.rank + self.suit,))
+
+    def __hash__(self) -> int:
+        """Hashes a card by its index."""
+        return self.index
+
     def __eq__(self, other) -> bool:
         """Checks if two cards are identical in rank and suit."""
-        if isinstance(other, Card):
-            return self.suit == other.suit and self.rank == other.rank
-        return False
-    
+        return self is other
+
     def sameValue(self, other) -> bool:
         """Checks if two cards share the same rank (value)."""
         if isinstance(other, Card):
             return self.value == other.value
         return False
-    
+
     def __lt__(self, other) -> bool:
         """Less-than comparison based on card value."""
         if isinstance(other, Card):
             return self.value < other.value
         return False
-    
+
     def __gt__(self, other) -> bool:
         """Greater-than comparison based on card value."""
         if isinstance(other, Card):
@@ -84,3 +133,32 @@ class Card():
         if isinstance(other, Card):
             return self.value >= other.value
         return False
+
+# The 52 interned cards, indexed by Card.index
+cardsByIndex = [Card._build(rankIndex, suitIndex) for rankIndex in range(13) for suitIndex in range(4)]
+
+# Cache of every string spelling parsed so far, seeded with the canonical 'AS' form
+cardsByStr = {card.rank + card.suit: card for card in cardsByIndex}
+
+def parseCard(cardStr: str) -> Card:
+    """
+    Parses a card string such as 'AS', 'as' or 'As' into its interned card.
+    Results are cached, so repeated spellings cost a single dict lookup.
+    Raises ValueError for strings that do not name a card.
+    """
+    card = cardsByStr.get(cardStr)
+    if card is not None:
+        return card
+    normalized = cardStr.strip().upper()
+    if len(normalized) != 2 or normalized[0] not in rankChars or normalized[1] not in suitChars:
+        raise ValueError(f"Invalid card string: {cardStr!r}")
+    card = cardsByIndex[rankChars.index(normalized[0]) * 4 + suitChars.index(normalized[1])]
+    cardsByStr[cardStr] = card
+    return card
+
+def parseCards(cardsStr: str) -> list[Card]:
+    """
+    Parses a whitespace or comma separated list of cards, e.g. 'AS KD' or 'Ah,Kd'.
+    Cards may also be run together, as in 'AhKd' or 'Qs7s2d'.
+    """
+    return [parseCard(token[i:i + 2]) for token in cardsStr.replace(',', ' ').split() for i in range(0, len(token), 2)]
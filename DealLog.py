@@ -0,0 +1,140 @@
+"""
+Compact binary log of simulated deals, for replaying and re-scoring results.
+
+File layout: an 8-byte header (magic, version, hands per trial) followed by
+one fixed-width record per trial: the five board cards, two hole cards for the
+player and then each opponent (one Card.index byte per card), and an outcome
+byte (0 loss, 1 tie, 2 win for the player). Nine opponents take 26 bytes a
+trial. Logs are read through mmap, so replaying does not load the file.
+"""
+
+from collections.abc import Callable, Iterator
+import mmap
+import struct
+from Evaluator import boardState, evaluateHole
+
+logMagic = b'DEAL'
+logVersion = 1
+headerFormat = '<4sHBx'
+headerSize = struct.calcsize(headerFormat)
+
+#Outcome byte values, from the player's point of view
+LOSS, TIE, WIN = 0, 1, 2
+
+def recordSize(numHands: int) -> int:
+    """Returns the bytes per trial for numHands hands (player included)."""
+    return 5 + 2 * numHands + 1
+
+def outcomeOf(playerStrength: int, bestOppStrength: int) -> int:
+    """Returns the outcome byte for a player strength against the best opponent strength."""
+    if playerStrength > bestOppStrength:
+        return WIN
+    return TIE if playerStrength == bestOppStrength else LOSS
+
+class DealRecorder:
+    """
+    Appends fixed-width trial records to a new log file.
+    Pass one to Simulation(recorder=...) to log every trial it samples
+    with runSim and runSims.
+    """
+
+    def __init__(self, path: str, numHands: int) -> None:
+        """
+        Creates the log at path for trials of numHands hands (the player
+        and every opponent) and writes its header.
+        """
+        self.path = path
+        self.numHands = numHands
+        self.recordSize = recordSize(numHands)
+        self.numRecords = 0
+        self.file = open(path, 'wb')
+        self.file.write(struct.pack(headerFormat, logMagic, logVersion, numHands))
+
+    def write(self, records: bytes) -> None:
+        """
+        Appends one or more packed records. Raises ValueError if the data is
+        not a whole number of records.
+        """
+        if len(records) % self.recordSize:
+            raise ValueError(f"Record data of {len(records)} bytes is not a multiple of {self.recordSize}")
+        self.file.write(records)
+        self.numRecords += len(records) // self.recordSize
+
+    def close(self) -> None:
+        """Flushes and closes the log."""
+        self.file.close()
+
+    def __enter__(self) -> 'DealRecorder':
+        return self
+
+    def __exit__(self, *excInfo) -> None:
+        self.close()
+
+class DealLog:
+    """
+    Read-only, memory mapped view of a log written by DealRecorder.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens and maps the log at path.
+        Raises ValueError if the file is not a deal log.
+        """
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.numHands = struct.unpack_from(headerFormat, self.map)
+        if magic != logMagic or version != logVersion:
+            raise ValueError(f"{path} is not a version {logVersion} deal log")
+        self.recordSize = recordSize(self.numHands)
+        self.numRecords = (len(self.map) - headerSize) // self.recordSize
+
+    def __len__(self) -> int:
+        """Returns the number of trials in the log."""
+        return self.numRecords
+
+    def __getitem__(self, position: int) -> tuple[list[int], list[tuple[int, int]], int]:
+        """
+        Returns trial position as (board indices, [(first, second) per hand], outcome),
+        with the player's hand first.
+        """
+        if position < 0:
+            position += self.numRecords
+        if not 0 <= position < self.numRecords:
+            raise IndexError("Deal log index out of range")
+        start = headerSize + position * self.recordSize
+        record = self.map[start:start + self.recordSize]
+        return list(record[:5]), [(record[j], record[j + 1]) for j in range(5, self.recordSize - 1, 2)], record[-1]
+
+    def __iter__(self) -> Iterator[tuple[list[int], list[tuple[int, int]], int]]:
+        """Yields every trial in order (see __getitem__)."""
+        for position in range(self.numRecords):
+            yield self[position]
+
+    def replay(self) -> tuple[int, int, int]:
+        """Returns the (wins, ties, losses) recorded in the log."""
+        outcomes = self.map[headerSize + self.recordSize - 1::self.recordSize]
+        return outcomes.count(WIN), outcomes.count(TIE), outcomes.count(LOSS)
+
+    def rescore(self, evaluate: Callable[[list[int]], int] = None) -> tuple[int, int, int, int]:
+        """
+        Re-evaluates every trial and returns (wins, ties, losses, mismatches),
+        where mismatches counts trials whose new outcome differs from the
+        recorded one. evaluate, if given, scores a list of seven Card.index
+        values (higher is better); by default the Evaluator tables are used.
+        """
+        counts = [0, 0, 0]
+        mismatches = 0
+        for board, hands, outcome in self:
+            if evaluate is None:
+                state = boardState(board)
+                strengths = [evaluateHole(state, first, second) for first, second in hands]
+            else:
+                strengths = [evaluate(board + [first, second]) for first, second in hands]
+            newOutcome = outcomeOf(strengths[0], max(strengths[1:]))
+            counts[newOutcome] += 1
+            mismatches += newOutcome != outcome
+        return counts[WIN], counts[TIE], counts[LOSS], mismatches
+
+    def close(self) -> None:
+        """Releases the memory map."""
+        self.map.close()
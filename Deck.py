@@ -1,5 +1,5 @@
-from random import shuffle
-from Card import Card
+from random import Random, shuffle
+from Card import Card, cardsByIndex
 
 # Definitions for suits and ranks to build a standard 52-card deck
 suits = ['H','S','C','D'] # Hearts, Spades, Clubs, Diamonds
@@ -68,4 +68,73 @@ class Deck():
         repString = f"Deck Length: {len(self.deck)}\n"
         for card in self.deck:
             repString += f"{card.__repr__()}\n"
-        return repString
\ No newline at end of file
+        return repString
+
+class BitmaskDeck():
+    """
+    Deck of card indices for simulation hot paths. The live cards occupy the
+    front of a preallocated array and dead cards are tracked in a 52-bit mask,
+    so removing a card is O(1) and dealing k cards draws only those k cards
+    (a partial Fisher-Yates shuffle) instead of shuffling the whole deck.
+    """
+    def __init__(self):
+        """
+        Initializes a full deck.
+        """
+        self.cards = list(range(52)) #Card indices, live ones in cards[:numLive]
+        self.positions = list(range(52)) #Position of each card index in cards
+        self.numLive = 52
+        self.deadMask = 0
+
+    def resetDeck(self) -> None:
+        """
+        Returns all removed and drawn cards to the deck.
+        """
+        self.numLive = 52
+        self.deadMask = 0
+
+    def removeCard(self, card: Card) -> None:
+        """
+        Removes a specific card from the deck in O(1).
+        Raises ValueError if the card was already removed or drawn, which
+        usually means duplicate cards were passed in as parameters.
+        """
+        if self.deadMask >> card.index & 1:
+            raise ValueError(f"Could not remove card, {card} is not in the deck. (Usually happens by passing in duplicate cards as parameters)")
+        self.kill(self.positions[card.index])
+
+    def drawCards(self, count: int, rng: Random) -> list[Card]:
+        """
+        Draws count random cards from the deck, touching only those cards.
+        """
+        drawn = []
+        for _ in range(count):
+            position = int(rng.random() * self.numLive)
+            drawn.append(cardsByIndex[self.cards[position]])
+            self.kill(position)
+        return drawn
+
+    def kill(self, position: int) -> None:
+        """
+        Moves the live card at position to the end of the live region and marks it dead.
+        """
+        cards = self.cards
+        last = self.numLive - 1
+        index, lastIndex = cards[position], cards[last]
+        cards[position], cards[last] = lastIndex, index
+        self.positions[lastIndex], self.positions[index] = position, last
+        self.numLive = last
+        self.deadMask |= 1 << index
+
+    def __len__(self) -> int:
+        """Returns the number of cards left in the deck."""
+        return self.numLive
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the current deck state.
+        """
+        repString = f"Deck Length: {self.numLive}\n"
+        for index in self.cards[:self.numLive]:
+            repString += f"{cardsByIndex[index].__repr__()}\n"
+        return repString
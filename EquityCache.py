@@ -0,0 +1,99 @@
+"""
+Suit-isomorphism canonicalization of equity queries and a bounded in-memory
+LRU cache of equity results keyed on the canonical form.
+
+Two queries that differ only by a relabelling of suits (AsKs on Qs7s2d versus
+AhKh on Qh7h2c) have the same equity, so they share one canonical key.
+"""
+
+from collections import OrderedDict
+from itertools import permutations
+from Card import Card
+from HandRange import HandRange
+
+suitPermutations = list(permutations(range(4)))
+
+def canonicalKey(playerHand: list[Card], knownComCards: list[Card], knownOppCards: list[list[Card]], numOpps: int, oppRanges: list[HandRange] = []) -> tuple:
+    """
+    Returns a hashable key that is identical for all queries equivalent under a
+    suit permutation. The order of the community cards, of the cards within a
+    hand and of the known opponent hands does not affect the key.
+    Opponent ranges are keyed by their weighted combos, in order.
+    """
+    playerCards = [(card.value - 2, card.index & 3) for card in playerHand]
+    comCards = [(card.value - 2, card.index & 3) for card in knownComCards]
+    oppCards = [[(card.value - 2, card.index & 3) for card in hand] for hand in knownOppCards]
+    rangeCombos = [
+        [(first >> 2, first & 3, second >> 2, second & 3, weight) for (first, second), weight in zip(oppRange.combos, oppRange.weights)]
+        for oppRange in oppRanges
+    ]
+
+    best = None
+    for perm in suitPermutations:
+        candidate = (
+            tuple(sorted(rank * 4 + perm[suit] for rank, suit in playerCards)),
+            tuple(sorted(rank * 4 + perm[suit] for rank, suit in comCards)),
+            tuple(sorted(tuple(sorted(rank * 4 + perm[suit] for rank, suit in hand)) for hand in oppCards)),
+            tuple(
+                tuple(sorted((*sorted((rank1 * 4 + perm[suit1], rank2 * 4 + perm[suit2])), weight) for rank1, suit1, rank2, suit2, weight in combos))
+                for combos in rangeCombos
+            ),
+        )
+        if best is None or candidate < best:
+            best = candidate
+    return best + (numOpps,)
+
+class EquityCache:
+    """
+    Bounded least-recently-used cache of equity results.
+    Values are the (wins, ties, losses, numSims, exact) stats of a Simulation.
+    """
+
+    def __init__(self, maxSize: int = 10000) -> None:
+        """
+        Creates an empty cache that holds at most maxSize results.
+        """
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> tuple:
+        """
+        Returns the cached result for key and marks it as recently used,
+        or None on a miss.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, entry: tuple) -> None:
+        """
+        Stores a result, evicting the least recently used one if the cache is full.
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns the hit, miss and eviction counts and the current size.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'maxSize': self.maxSize,
+        }
+
+    def __len__(self) -> int:
+        """Returns the number of cached results."""
+        return len(self.entries)
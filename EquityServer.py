@@ -0,0 +1,329 @@
+"""
+Local HTTP service answering equity queries from a shared worker pool.
+
+POST /equity with a JSON body such as
+
+    {"hand": "AsKs", "board": "Qs7s2d", "opponents": ["QhQd"], "ranges": ["TT+, AQs+"],
+     "numOpps": 3, "precision": 0.005}
+
+returns the equity, its standard error, the trials behind it and latency
+timings. GET /stats returns request counts, latency percentiles and cache stats.
+
+All queries run on one asyncio loop that hands simulation batches to a shared
+process pool, so concurrent queries interleave on the same workers. Queries
+with the same canonical key (see EquityCache.canonicalKey) are coalesced: one
+computation runs and the others wait for it, then read its result from the cache.
+"""
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import asyncio
+import json
+import threading
+import time
+from Card import parseCards
+from EquityCache import EquityCache
+from HandRange import HandRange
+from PersistentCache import PersistentCache
+from Simulation import Simulation, runExactShard
+
+#Number of recent query latencies kept for the percentiles in /stats
+latencyWindow = 1000
+
+def parseCardField(value, description: str, maxCards: int, exactly: bool = False) -> list:
+    """
+    Parses a card string field, checking it holds maxCards cards (or at most
+    maxCards unless exactly is set). Raises ValueError otherwise.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"{description} must be a string of cards")
+    cards = parseCards(value)
+    if len(cards) > maxCards or (exactly and len(cards) != maxCards):
+        raise ValueError(f"{description} {value!r} must be {'' if exactly else 'at most '}{maxCards} cards")
+    return cards
+
+def parseCount(body: dict, name: str, default: int):
+    """
+    Returns the integer field name of body (default if missing).
+    Raises ValueError unless it is an integer of at least 1.
+    """
+    value = body.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"'{name}' must be a positive integer, not {value!r}")
+    return value
+
+def parseQuery(body: dict) -> dict:
+    """
+    Validates a JSON equity query and returns it with cards and ranges parsed.
+    numOpps defaults to the number of known opponents and ranges, or 1.
+    Raises ValueError for missing or malformed fields.
+    """
+    if not isinstance(body, dict) or 'hand' not in body:
+        raise ValueError("Query must be a JSON object with a 'hand' field")
+    playerHand = parseCardField(body['hand'], "Hand", 2, exactly=True)
+    knownComCards = parseCardField(body.get('board', ''), "Board", 5)
+    opponents = body.get('opponents', [])
+    ranges = body.get('ranges', [])
+    if not isinstance(opponents, list) or not isinstance(ranges, list):
+        raise ValueError("'opponents' and 'ranges' must be lists")
+    knownOppCards = [parseCardField(hand, "Opponent hand", 2, exactly=True) for hand in opponents]
+    if not all(isinstance(rangeStr, str) for rangeStr in ranges):
+        raise ValueError("Every range must be a range string")
+    oppRanges = [HandRange(rangeStr) for rangeStr in ranges]
+    numOpps = parseCount(body, 'numOpps', len(knownOppCards) + len(oppRanges) or 1)
+    if numOpps < len(knownOppCards) + len(oppRanges):
+        raise ValueError(f"numOpps {numOpps} is less than the {len(knownOppCards) + len(oppRanges)} known opponents and ranges")
+    if 2 * (numOpps + 1) + 5 > 52:
+        raise ValueError(f"numOpps {numOpps} needs more than 52 cards")
+    precision = float(body.get('precision', 0.005))
+    confidence = float(body.get('confidence', 0.95))
+    if not precision > 0:
+        raise ValueError(f"'precision' must be positive, not {precision!r}")
+    if not 0 < confidence < 1:
+        raise ValueError(f"'confidence' must be between 0 and 1, not {confidence!r}")
+    return {
+        'playerHand': playerHand,
+        'knownComCards': knownComCards,
+        'knownOppCards': knownOppCards,
+        'oppRanges': oppRanges,
+        'numOpps': numOpps,
+        'precision': precision,
+        'confidence': confidence,
+        'maxSims': parseCount(body, 'maxSims', None),
+    }
+
+def simulationResult(sim: Simulation) -> dict:
+    """
+    Returns the JSON-ready result of a simulation: equity, win/tie/loss
+    fractions (0.0 if no trial ran), standard error, trials and exactness.
+    """
+    numSims = sim.numSims or 1
+    return {
+        'equity': sim.getEquity(),
+        'win': sim.wins / numSims,
+        'tie': sim.ties / numSims,
+        'loss': sim.losses / numSims,
+        'standardError': sim.getStandardError(),
+        'numSims': sim.numSims,
+        'exact': sim.exact,
+    }
+
+class EquityDispatcher:
+    """
+    Runs equity queries on an asyncio loop, coalescing concurrent queries with
+    the same canonical key and caching every result.
+    """
+
+    def __init__(self, executor: Executor, cache: EquityCache = None, timeLimit: float = 10.0, batchSize: int = 20000) -> None:
+        """
+        Creates a dispatcher that runs simulation batches of batchSize trials in
+        executor and gives each query at most timeLimit seconds of simulation.
+        """
+        self.executor = executor
+        self.cache = cache if cache is not None else EquityCache()
+        self.timeLimit = timeLimit
+        self.batchSize = batchSize
+        self.inFlight = {}
+        self.numQueries = 0
+        self.numCoalesced = 0
+        self.numErrors = 0
+        self.trialsRun = 0
+        self.computeSeconds = 0.0
+        self.latencies = deque(maxlen=latencyWindow)
+
+    async def query(self, query: dict) -> dict:
+        """
+        Answers one parsed query (see parseQuery). Returns a JSON-ready dict with
+        the equity, win/tie/loss fractions, standard error, trials and latencies.
+        """
+        start = time.perf_counter()
+        self.numQueries += 1
+        sim = Simulation(query['playerHand'], query['knownComCards'], query['knownOppCards'], query['numOpps'], oppRanges=query['oppRanges'])
+        key = sim.getCacheKey()
+
+        # Wait for a computation of the same key without taking on its failure;
+        # if it left no cached result, solve below computes one afresh
+        coalesced = False
+        while key in self.inFlight:
+            coalesced = True
+            await asyncio.wait([self.inFlight[key]])
+        if coalesced:
+            self.numCoalesced += 1
+
+        task = asyncio.get_running_loop().create_task(self.solve(sim, key, query))
+        self.inFlight[key] = task
+        task.add_done_callback(lambda _: self.inFlight.pop(key, None))
+        trialsRun, computeTime = await task
+
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        return {
+            **simulationResult(sim),
+            'trialsRun': trialsRun,
+            'coalesced': coalesced,
+            'latencyMs': {'total': latency * 1000, 'compute': computeTime * 1000, 'wait': (latency - computeTime) * 1000},
+        }
+
+    async def solve(self, sim: Simulation, key: tuple, query: dict) -> tuple[int, float]:
+        """
+        Brings sim to the requested precision, starting from the cached result
+        or the preflop table, and stores the result in the cache.
+        Returns (trialsRun, computeSeconds).
+        """
+        entry = self.cache.get(key)
+        if entry is not None:
+            sim.wins, sim.ties, sim.losses, sim.numSims, sim.exact = entry
+        else:
+            sim.loadPreflopEquity()
+
+        start = time.perf_counter()
+        startSims = sim.numSims
+        if sim.numSims == 0 and sim.useExact("auto"):
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, runExactShard, sim.playerHand, sim.knownComCards, sim.knownOppCards, sim.numOpps)
+            sim.mergeShardResult(result)
+            sim.exact = True
+        elif not sim.exact:
+            await sim.runUntilAsync(query['precision'], query['confidence'], self.timeLimit, query['maxSims'], self.batchSize, self.executor)
+        computeTime = time.perf_counter() - start
+
+        trialsRun = sim.numSims - startSims
+        if trialsRun or entry is None:
+            self.cache.put(key, (sim.wins, sim.ties, sim.losses, sim.numSims, sim.exact))
+        self.trialsRun += trialsRun
+        self.computeSeconds += computeTime
+        return trialsRun, computeTime
+
+    async def stats(self) -> dict:
+        """
+        Returns query counts, latency percentiles over the last latencyWindow
+        queries, simulation throughput and cache stats.
+        """
+        latencies = sorted(self.latencies)
+        percentiles = {
+            f'p{percent}': latencies[min(len(latencies) - 1, len(latencies) * percent // 100)] * 1000
+            for percent in (50, 95, 99)
+        } if latencies else {}
+        return {
+            'queries': self.numQueries,
+            'coalesced': self.numCoalesced,
+            'errors': self.numErrors,
+            'inFlight': len(self.inFlight),
+            'latencyMs': percentiles,
+            'trialsRun': self.trialsRun,
+            'trialsPerComputeSecond': self.trialsRun / self.computeSeconds if self.computeSeconds else 0.0,
+            'cache': self.cache.stats(),
+        }
+
+class EquityRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves POST /equity and GET /stats by submitting work to the server's
+    dispatcher loop and waiting for the result.
+    """
+
+    def do_POST(self) -> None:
+        """
+        Answers an equity query. Malformed queries get a 400 error and any
+        other failure a 500 error, both as JSON.
+        """
+        if self.path != '/equity':
+            self.sendJson(404, {'error': f"Unknown path {self.path}"})
+            return
+        dispatcher = self.server.dispatcher
+        try:
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                query = parseQuery(body)
+            except TypeError as error:
+                raise ValueError(str(error)) from error
+            result = self.server.submit(dispatcher.query(query))
+        except ValueError as error:
+            self.server.submit(self.countError())
+            self.sendJson(400, {'error': str(error)})
+            return
+        except Exception as error:
+            self.server.submit(self.countError())
+            self.sendJson(500, {'error': f"{type(error).__name__}: {error}"})
+            return
+        self.sendJson(200, result)
+
+    def do_GET(self) -> None:
+        """Returns the dispatcher stats."""
+        if self.path != '/stats':
+            self.sendJson(404, {'error': f"Unknown path {self.path}"})
+            return
+        self.sendJson(200, self.server.submit(self.server.dispatcher.stats()))
+
+    async def countError(self) -> None:
+        """Counts a rejected query on the dispatcher loop."""
+        self.server.dispatcher.numErrors += 1
+
+    def sendJson(self, status: int, payload: dict) -> None:
+        """Writes payload as a JSON response."""
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        """Keeps request logging quiet unless the server is verbose."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class EquityServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server whose request threads hand queries to one
+    EquityDispatcher running on a background event loop.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], dispatcher: EquityDispatcher, verbose: bool = False) -> None:
+        """
+        Binds to address and starts the dispatcher's event loop thread.
+        """
+        super().__init__(address, EquityRequestHandler)
+        self.dispatcher = dispatcher
+        self.verbose = verbose
+        self.loop = asyncio.new_event_loop()
+        self.loopThread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loopThread.start()
+
+    def submit(self, coroutine):
+        """Runs a coroutine on the dispatcher loop and returns its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def server_close(self) -> None:
+        """Closes the socket and stops the dispatcher loop."""
+        super().server_close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loopThread.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve equity queries over HTTP on localhost.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to bind")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--cache-size', type=int, default=10000, help="results kept in the LRU cache")
+    parser.add_argument('--cache-db', help="SQLite file to use as a persistent cache instead of the LRU cache")
+    parser.add_argument('--time-limit', type=float, default=10.0, help="simulation seconds allowed per query")
+    parser.add_argument('--batch-size', type=int, default=20000, help="trials per batch sent to a worker")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        cache = PersistentCache(args.cache_db) if args.cache_db else EquityCache(args.cache_size)
+        dispatcher = EquityDispatcher(executor, cache, args.time_limit, args.batch_size)
+        server = EquityServer((args.host, args.port), dispatcher, args.verbose)
+        print(f"Serving equity queries on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
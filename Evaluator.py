@@ -0,0 +1,368 @@
+"""
+Table-driven evaluator that maps any 5, 6 or 7 cards to a single strength integer.
+
+Strengths compare directly: a higher strength is a better hand and equal strengths tie.
+A strength is laid out as category << 20 followed by up to five 4-bit rank values, where
+the category is the HandType value, so handTypeOf(strength) is a shift.
+
+Cards are looked up by Card.index (0-51). Hands without a flush are scored by the
+product of their rank primes, and flushes by the rank bitmask of the flush suit.
+Omaha hands (exactly two of four hole cards with three board cards) are scored
+from the board's ten three-card subsets and the hand's six hole pairs.
+
+evaluateBatch scores whole arrays of hands with vectorized NumPy operations
+when NumPy is installed, and falls back to a plain loop otherwise.
+"""
+
+from array import array
+from itertools import combinations, combinations_with_replacement
+from Card import Card, cardsByIndex
+from HandType import HandType
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Per-card lookup lists, indexed by Card.index
+cardPrimes = [card.packed & 0xFF for card in cardsByIndex]
+cardRankBits = [1 << (card.value - 2) for card in cardsByIndex]
+cardSuits = [card.index & 3 for card in cardsByIndex]
+# Each suit owns a 4-bit counter, so summing these counts the cards of every suit at once
+cardSuitKeys = [1 << (4 * (card.index & 3)) for card in cardsByIndex]
+
+wheelMask = 0b1000000001111 # A, 5, 4, 3, 2
+
+def _encode(handType: HandType, values: list[int]) -> int:
+    """Packs a category and its significant rank values (highest first) into a strength."""
+    strength = handType.value
+    for i in range(5):
+        strength = (strength << 4) | (values[i] if i < len(values) else 0)
+    return strength
+
+def _straightHigh(mask: int) -> int:
+    """Returns the high card value of the best straight in a rank bitmask, or 0 if none."""
+    for high in range(12, 3, -1):
+        window = 0b11111 << (high - 4)
+        if mask & window == window:
+            return high + 2
+    if mask & wheelMask == wheelMask:
+        return 5
+    return 0
+
+def _flushStrength(mask: int) -> int:
+    """Scores the cards of a single suit given as a rank bitmask (5 or more bits set)."""
+    high = _straightHigh(mask)
+    if high == 14:
+        return _encode(HandType.ROYAL_FLUSH, [14])
+    if high:
+        return _encode(HandType.STRAIGHT_FLUSH, [high])
+    values = [rank + 2 for rank in range(12, -1, -1) if mask & (1 << rank)]
+    return _encode(HandType.FLUSH, values[:5])
+
+def _rankStrength(counts: list[int]) -> int:
+    """Scores a multiset of ranks (counts indexed by rank) ignoring suits."""
+    byCount = [[], [], [], [], []]
+    mask = 0
+    for rank in range(12, -1, -1):
+        if counts[rank]:
+            byCount[counts[rank]].append(rank + 2)
+            mask |= 1 << rank
+    values = [rank + 2 for rank in range(12, -1, -1) if counts[rank]]
+
+    if byCount[4]:
+        quad = byCount[4][0]
+        return _encode(HandType.FOUR_OF_A_KIND, [quad] + [v for v in values if v != quad][:1])
+    if byCount[3] and len(byCount[3]) + len(byCount[2]) >= 2:
+        trips = byCount[3][0]
+        pair = max(v for v in byCount[3][1:] + byCount[2])
+        return _encode(HandType.FULL_HOUSE, [trips, pair])
+    high = _straightHigh(mask)
+    if high:
+        return _encode(HandType.STRAIGHT, [high])
+    if byCount[3]:
+        trips = byCount[3][0]
+        return _encode(HandType.THREE_OF_A_KIND, [trips] + [v for v in values if v != trips][:2])
+    if len(byCount[2]) >= 2:
+        pairs = byCount[2][:2]
+        return _encode(HandType.TWO_PAIR, pairs + [v for v in values if v not in pairs][:1])
+    if byCount[2]:
+        pair = byCount[2][0]
+        return _encode(HandType.PAIR, [pair] + [v for v in values if v != pair][:3])
+    return _encode(HandType.HIGH_CARD, values[:5])
+
+def _buildRankTable() -> dict[int, int]:
+    """Scores every multiset of 5 to 7 ranks (at most 4 of each), keyed by prime product."""
+    table = {}
+    primes = [card.packed & 0xFF for card in cardsByIndex[::4]]
+    counts = [0] * 13
+
+    def fill(rank: int, remaining: int, product: int) -> None:
+        if rank == 13:
+            if remaining <= 2:
+                table[product] = _rankStrength(counts)
+            return
+        for count in range(min(4, remaining) + 1):
+            counts[rank] = count
+            fill(rank + 1, remaining - count, product * primes[rank] ** count)
+        counts[rank] = 0
+
+    fill(0, 7, 1)
+    return table
+
+def _buildFlushTables() -> tuple[list[int], list[int]]:
+    """Builds the flush strength per rank bitmask and the flush suit per summed suit key."""
+    flushTable = [_flushStrength(mask) if mask.bit_count() >= 5 else 0 for mask in range(1 << 13)]
+    flushSuitTable = [-1] * (1 << 16)
+    for clubs in range(8):
+        for diamonds in range(8 - clubs):
+            for hearts in range(8 - clubs - diamonds):
+                for spades in range(8 - clubs - diamonds - hearts):
+                    suitCounts = [clubs, diamonds, hearts, spades]
+                    key = clubs | (diamonds << 4) | (hearts << 8) | (spades << 12)
+                    for suit in range(4):
+                        if suitCounts[suit] >= 5:
+                            flushSuitTable[key] = suit
+    return flushTable, flushSuitTable
+
+rankTable = _buildRankTable()
+flushTable, flushSuitTable = _buildFlushTables()
+
+def evaluateIndices(indices: list[int]) -> int:
+    """
+    Returns the strength of the best 5-card hand among 5 to 7 cards given by Card.index.
+    """
+    product = 1
+    suitKey = 0
+    for index in indices:
+        product *= cardPrimes[index]
+        suitKey += cardSuitKeys[index]
+    flushSuit = flushSuitTable[suitKey]
+    if flushSuit >= 0:
+        mask = 0
+        for index in indices:
+            if cardSuits[index] == flushSuit:
+                mask |= cardRankBits[index]
+        strength = flushTable[mask]
+        if strength:
+            return strength
+    return rankTable[product]
+
+def boardState(boardIndices: list[int]) -> tuple[int, int, list[int]]:
+    """
+    Preprocesses community cards (given by Card.index) once so that many hole-card
+    pairs can be scored against them with evaluateHole. Returns the product of the
+    board's rank primes, its summed suit key and the rank bitmask of each suit.
+    """
+    product = 1
+    suitKey = 0
+    suitMasks = [0, 0, 0, 0]
+    for index in boardIndices:
+        product *= cardPrimes[index]
+        suitKey += cardSuitKeys[index]
+        suitMasks[cardSuits[index]] |= cardRankBits[index]
+    return product, suitKey, suitMasks
+
+def evaluateHole(state: tuple[int, int, list[int]], first: int, second: int) -> int:
+    """
+    Returns the strength of two hole cards (Card.index values) together with a
+    board preprocessed by boardState. Equal to evaluateIndices on all the cards.
+    """
+    product, suitKey, suitMasks = state
+    flushSuit = flushSuitTable[suitKey + cardSuitKeys[first] + cardSuitKeys[second]]
+    if flushSuit >= 0:
+        mask = suitMasks[flushSuit]
+        if cardSuits[first] == flushSuit:
+            mask |= cardRankBits[first]
+        if cardSuits[second] == flushSuit:
+            mask |= cardRankBits[second]
+        strength = flushTable[mask]
+        if strength:
+            return strength
+    return rankTable[product * cardPrimes[first] * cardPrimes[second]]
+
+def evaluate(cards: list[Card]) -> int:
+    """
+    Returns the strength of the best 5-card hand among 5 to 7 cards.
+    """
+    return evaluateIndices([card.index for card in cards])
+
+def pairState(first: int, second: int) -> tuple[int, int, int]:
+    """
+    Returns (rank prime product, suit, rank bitmask) of two cards given by
+    Card.index, where suit is -1 unless both cards share it.
+    """
+    suit = cardSuits[first] if cardSuits[first] == cardSuits[second] else -1
+    return cardPrimes[first] * cardPrimes[second], suit, cardRankBits[first] | cardRankBits[second]
+
+# State of every two-card pair (see pairState), indexed by first * 52 + second
+pairStateTable = [pairState(first, second) if first != second else None for first in range(52) for second in range(52)]
+
+def omahaBoardState(boardIndices: list[int]) -> list[tuple[int, int, int]]:
+    """
+    Preprocesses a five-card Omaha board once for evaluateOmaha: the state of
+    each of its ten three-card subsets, built from pairStateTable.
+    """
+    states = []
+    for first, second, third in combinations(boardIndices, 3):
+        product, suit, mask = pairStateTable[first * 52 + second]
+        if suit != cardSuits[third]:
+            suit = -1
+        states.append((product * cardPrimes[third], suit, mask | cardRankBits[third]))
+    return states
+
+def omahaHoleState(holeIndices: list[int]) -> list[tuple[int, int, int]]:
+    """
+    Preprocesses four Omaha hole cards once for evaluateOmaha: the state of
+    each of their six two-card pairs, looked up in pairStateTable.
+    """
+    first, second, third, fourth = holeIndices
+    return [
+        pairStateTable[first * 52 + second], pairStateTable[first * 52 + third], pairStateTable[first * 52 + fourth],
+        pairStateTable[second * 52 + third], pairStateTable[second * 52 + fourth], pairStateTable[third * 52 + fourth],
+    ]
+
+def evaluateOmaha(boardTriples: list[tuple[int, int, int]], holePairs: list[tuple[int, int, int]]) -> int:
+    """
+    Returns the strength of the best Omaha hand, made of exactly two hole cards
+    and three board cards, from states built by omahaBoardState and omahaHoleState.
+    Each of the 60 combinations costs one table lookup: a flush needs a one-suit
+    triple and pair of the same suit, and everything else is keyed by the
+    product of rank primes.
+    """
+    best = 0
+    for tripleProduct, tripleSuit, tripleMask in boardTriples:
+        for pairProduct, pairSuit, pairMask in holePairs:
+            if tripleSuit == pairSuit >= 0:
+                strength = flushTable[tripleMask | pairMask]
+            else:
+                strength = rankTable[tripleProduct * pairProduct]
+            if strength > best:
+                best = strength
+    return best
+
+def evaluateOmahaCards(holeCards: list[Card], boardCards: list[Card]) -> int:
+    """
+    Returns the strength of the best Omaha hand from four hole cards and a
+    five-card board.
+    """
+    return evaluateOmaha(omahaBoardState([card.index for card in boardCards]), omahaHoleState([card.index for card in holeCards]))
+
+def handTypeOf(strength: int) -> HandType:
+    """Returns the HandType encoded in a strength."""
+    return HandType(strength >> 20)
+
+#Rows evaluated per vectorized step, to bound the temporary arrays
+batchChunkRows = 1 << 18
+
+# Per-rank keys whose sums are distinct for every multiset of 5, 6 or 7 ranks
+# (at most four of each), so a rank sum can index a dense table
+batchRankKeys = [0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181]
+
+_numpyTables = {}
+
+def _buildNumpyTables(handSize: int) -> tuple:
+    """
+    Returns the NumPy lookup arrays for hands of handSize cards: a per-card key
+    holding the rank key in the low 32 bits and the suit key above them, the
+    non-flush strength per rank key sum, and the per-card suits, rank bits,
+    flush suit table and flush table. Built on first use for each size.
+    """
+    if handSize not in _numpyTables:
+        primes = cardPrimes[::4]
+        rankSums = {}
+        for ranks in combinations_with_replacement(range(13), handSize):
+            if max(ranks.count(rank) for rank in set(ranks)) <= 4:
+                product = 1
+                for rank in ranks:
+                    product *= primes[rank]
+                rankSums[sum(batchRankKeys[rank] for rank in ranks)] = rankTable[product]
+        strengths = np.zeros(max(rankSums) + 1, dtype=np.int32)
+        strengths[list(rankSums)] = list(rankSums.values())
+        _numpyTables[handSize] = (
+            np.array([batchRankKeys[index >> 2] | (cardSuitKeys[index] << 32) for index in range(52)], dtype=np.int64),
+            strengths,
+            np.array(cardSuits, dtype=np.int8),
+            np.array(cardRankBits, dtype=np.int32),
+            np.array(flushSuitTable, dtype=np.int8),
+            np.array(flushTable, dtype=np.int32),
+        )
+    return _numpyTables[handSize]
+
+def _evaluateRows(rows) -> 'np.ndarray':
+    """
+    Returns the strengths of an N x k NumPy array of Card.index values (k from
+    5 to 7) using whole-array gathers and table lookups instead of a Python loop.
+    """
+    cardKeys, rankStrengths, suits, rankBits, flushSuits, flushes = _buildNumpyTables(rows.shape[1])
+    keys = cardKeys[rows].sum(axis=1)
+    strengths = rankStrengths[keys & 0xFFFFFFFF]
+    flushSuit = flushSuits[keys >> 32]
+    flushRows = np.flatnonzero(flushSuit >= 0)
+    if len(flushRows):
+        cards = rows[flushRows]
+        # Ranks within one suit are distinct, so summing their bits gives the mask
+        masks = np.where(suits[cards] == flushSuit[flushRows, None], rankBits[cards], 0).sum(axis=1)
+        flushStrengths = flushes[masks]
+        strengths[flushRows] = np.where(flushStrengths > 0, flushStrengths, strengths[flushRows])
+    return strengths
+
+def evaluateBatch(hands) -> tuple:
+    """
+    Evaluates many hands in one call. hands is a sequence of rows of Card.index values
+    (5 to 7 per row), such as a list of lists or an N x 7 integer array.
+    Returns (strengths, handTypes) where handTypes holds HandType values: NumPy
+    arrays from the vectorized path when NumPy is installed and every row has
+    the same length, otherwise array.array objects from a per-hand loop.
+    """
+    if np is not None:
+        rows = hands if isinstance(hands, np.ndarray) else None
+        if rows is None:
+            try:
+                rows = np.asarray(hands, dtype=np.intp)
+            except ValueError:
+                rows = None
+        if rows is not None and rows.ndim == 2 and 5 <= rows.shape[1] <= 7:
+            rows = rows.astype(np.intp, copy=False)
+            strengths = np.empty(len(rows), dtype=np.int32)
+            for start in range(0, len(rows), batchChunkRows):
+                strengths[start:start + batchChunkRows] = _evaluateRows(rows[start:start + batchChunkRows])
+            return strengths, (strengths >> 20).astype(np.int8)
+    return _evaluateBatchLoop(hands)
+
+def _evaluateBatchLoop(hands) -> tuple[array, array]:
+    """
+    evaluateBatch without NumPy: scores each row in a loop with the lookup
+    tables bound to locals. Returns (strengths, handTypes) as arrays.
+    """
+    if hasattr(hands, 'tolist'):
+        hands = hands.tolist()
+    primes = cardPrimes
+    suitKeys = cardSuitKeys
+    suits = cardSuits
+    rankBits = cardRankBits
+    flushSuits = flushSuitTable
+    flushes = flushTable
+    ranks = rankTable
+
+    strengths = []
+    append = strengths.append
+    for hand in hands:
+        product = 1
+        suitKey = 0
+        for index in hand:
+            product *= primes[index]
+            suitKey += suitKeys[index]
+        flushSuit = flushSuits[suitKey]
+        if flushSuit >= 0:
+            mask = 0
+            for index in hand:
+                if suits[index] == flushSuit:
+                    mask |= rankBits[index]
+            strength = flushes[mask]
+            if strength:
+                append(strength)
+                continue
+        append(ranks[product])
+    handTypes = array('b', [strength >> 20 for strength in strengths])
+    return array('l', strengths), handTypes
@@ -0,0 +1,223 @@
+"""
+Bulk replay of PokerStars-style hand histories.
+
+For every hand that reaches a showdown, records the shown hole cards, each
+player's hand category (via HandIdentifier), the players with the best hand,
+the pot collections, and the win/tie equity of every shown hand on each street
+from the last all-in onwards (or on every street with --equity all).
+
+The log is memory mapped and split into chunks on hand boundaries. Each worker
+process maps the file itself and streams its chunk line by line, so no hand
+text is copied between processes. Card tokens go through the cached parseCard.
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import mmap
+import os
+import re
+from Card import Card, parseCards
+from HandIdentifier import HandIdentifier
+from Simulation import Simulation
+
+#Every hand starts with a line beginning with this marker
+handMarker = b'PokerStars '
+
+headerPattern = re.compile(r'^PokerStars (?:\w+ )*(?:Hand|Game) #(\d+)')
+streetPattern = re.compile(r'^\*\*\* (FLOP|TURN|RIVER) \*\*\*')
+bracketPattern = re.compile(r'\[([^\]]*)\]')
+showsPattern = re.compile(r'^(.+?): shows \[([^\]]+)\]')
+collectedPattern = re.compile(r'^(.+?) collected \D*([\d,.]+)')
+actionPattern = re.compile(r'^(.+?): ')
+
+#Board size on each street
+streetBoardSizes = {'preflop': 0, 'flop': 3, 'turn': 4, 'river': 5}
+streetOrder = list(streetBoardSizes)
+
+def findChunks(data: mmap.mmap, chunkBytes: int) -> list[tuple[int, int]]:
+    """
+    Splits the mapped log into (start, end) byte ranges of about chunkBytes
+    that each begin at the start of a hand.
+    """
+    chunks = []
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b'\n' + handMarker, start + chunkBytes)
+        end = size if end == -1 else end + 1
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+def readHands(data: mmap.mmap, start: int, end: int):
+    """
+    Yields the decoded lines of every hand in data[start:end], one list per hand.
+    """
+    data.seek(start)
+    lines = []
+    while data.tell() < end:
+        line = data.readline().decode('utf-8', 'replace').strip()
+        if line.startswith('PokerStars ') and lines:
+            yield lines
+            lines = []
+        if line:
+            lines.append(line)
+    if lines:
+        yield lines
+
+def parseHand(lines: list[str]) -> dict:
+    """
+    Parses one hand into its id, final board, shown hole cards, collections and
+    the street of the last all-in. Returns None if the hand has no header.
+    """
+    match = headerPattern.match(lines[0])
+    if match is None:
+        return None
+    hand = {'id': match.group(1), 'board': [], 'shown': {}, 'collected': {}, 'allInStreet': None}
+    street = 'preflop'
+    for line in lines[1:]:
+        if line.startswith('***'):
+            match = streetPattern.match(line)
+            if match:
+                street = match.group(1).lower()
+                hand['board'] = parseCards(' '.join(bracketPattern.findall(line)))
+            continue
+        if line.startswith('Board ['):
+            hand['board'] = parseCards(bracketPattern.search(line).group(1))
+            continue
+        match = showsPattern.match(line)
+        if match:
+            hand['shown'][match.group(1)] = parseCards(match.group(2))
+            continue
+        match = collectedPattern.match(line)
+        if match:
+            name = match.group(1)
+            hand['collected'][name] = hand['collected'].get(name, 0.0) + float(match.group(2).replace(',', ''))
+            continue
+        if line.endswith('and is all-in') and actionPattern.match(line):
+            hand['allInStreet'] = street
+    return hand
+
+def streetEquities(shown: dict[str, list[Card]], board: list[Card], streets: list[str], trials: int, seed: int) -> dict:
+    """
+    Returns {street: {player: {'win', 'tie'}}} for every shown hand against the
+    other shown hands with the board as it stood on each street. Streets whose
+    runouts are few enough are enumerated exactly, the rest use trials samples.
+    """
+    equities = {}
+    for street in streets:
+        streetBoard = board[:streetBoardSizes[street]]
+        equities[street] = {}
+        for name, holeCards in shown.items():
+            others = [cards for other, cards in shown.items() if other != name]
+            sim = Simulation(holeCards, streetBoard, others, len(others), seed=seed)
+            sim.runSims(trials, exact="auto")
+            equities[street][name] = {'win': sim.wins / sim.numSims, 'tie': sim.ties / sim.numSims}
+    return equities
+
+def cardsStr(cards: list[Card]) -> str:
+    """Returns cards as a space separated string such as 'AH KD'."""
+    return ' '.join(card.rank + card.suit for card in cards)
+
+def evaluateHand(hand: dict, equityMode: str, trials: int) -> dict:
+    """
+    Evaluates the showdown of a parsed hand. Returns a JSON-ready record, or
+    None if fewer than two complete hands were shown on a full board.
+    """
+    board = hand['board']
+    shown = {name: cards for name, cards in hand['shown'].items() if len(cards) == 2}
+    if len(board) != 5 or len(shown) < 2:
+        return None
+    identifiers = {name: HandIdentifier(cards + board) for name, cards in shown.items()}
+    best = max(identifier.getStrength() for identifier in identifiers.values())
+    record = {
+        'hand': hand['id'],
+        'board': cardsStr(board),
+        'players': {
+            name: {
+                'cards': cardsStr(shown[name]),
+                'category': identifier.getType().name,
+                'collected': hand['collected'].get(name, 0.0),
+            }
+            for name, identifier in identifiers.items()
+        },
+        'winners': [name for name, identifier in identifiers.items() if identifier.getStrength() == best],
+        'allInStreet': hand['allInStreet'],
+    }
+    if equityMode == 'all':
+        streets = streetOrder
+    elif equityMode == 'allin' and hand['allInStreet'] is not None:
+        streets = streetOrder[streetOrder.index(hand['allInStreet']):]
+    else:
+        streets = []
+    if streets:
+        record['equity'] = streetEquities(shown, board, streets, trials, int(hand['id']) if hand['id'].isdigit() else 0)
+    return record
+
+def processChunk(path: str, start: int, end: int, equityMode: str, trials: int) -> tuple[list[dict], int, int]:
+    """
+    Worker entry point: maps the log, parses and evaluates every hand in
+    [start, end) and returns (showdown records, number of hands read, number
+    of hands skipped). A hand that fails to parse or evaluate, such as one
+    with a malformed card, is skipped rather than stopping the chunk.
+    """
+    records = []
+    numHands = 0
+    numSkipped = 0
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for lines in readHands(data, start, end):
+            try:
+                hand = parseHand(lines)
+                if hand is None:
+                    continue
+                record = evaluateHand(hand, equityMode, trials)
+            except Exception:
+                numSkipped += 1
+                continue
+            numHands += 1
+            if record is not None:
+                records.append(record)
+    return records, numHands, numSkipped
+
+def ingest(path: str, outputPath: str, equityMode: str = 'allin', trials: int = 20000, numWorkers: int = None, chunkBytes: int = 1 << 22) -> dict:
+    """
+    Replays the hand history at path over a process pool, writing one JSON
+    line per showdown to outputPath in log order. Returns a summary with hand
+    and showdown counts, the number of malformed hands skipped and the number
+    of winning hands of each category.
+    """
+    numWorkers = numWorkers or os.cpu_count() or 1
+    summary = {'hands': 0, 'skipped': 0, 'showdowns': 0, 'allIns': 0, 'winningCategories': Counter()}
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            chunks = []
+        else:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                chunks = findChunks(data, chunkBytes)
+
+    with open(outputPath, 'w') as output, ProcessPoolExecutor(max_workers=numWorkers) as executor:
+        starts, ends = [chunk[0] for chunk in chunks], [chunk[1] for chunk in chunks]
+        numChunks = len(chunks)
+        for records, numHands, numSkipped in executor.map(processChunk, [path] * numChunks, starts, ends, [equityMode] * numChunks, [trials] * numChunks):
+            summary['hands'] += numHands
+            summary['skipped'] += numSkipped
+            for record in records:
+                summary['showdowns'] += 1
+                summary['allIns'] += record['allInStreet'] is not None
+                summary['winningCategories'][record['players'][record['winners'][0]]['category']] += 1
+                output.write(json.dumps(record) + '\n')
+    summary['winningCategories'] = dict(summary['winningCategories'].most_common())
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate every showdown in a PokerStars-style hand history.")
+    parser.add_argument('input', help="hand history file")
+    parser.add_argument('output', help="JSONL file to write one record per showdown to")
+    parser.add_argument('--equity', choices=['allin', 'all', 'none'], default='allin', help="streets to compute equity on: from the last all-in, every street, or none")
+    parser.add_argument('--trials', type=int, default=20000, help="sampled trials for streets too large to enumerate")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunk-bytes', type=int, default=1 << 22, help="approximate bytes of log per work unit")
+    args = parser.parse_args()
+    print(json.dumps(ingest(args.input, args.output, args.equity, args.trials, args.workers, args.chunk_bytes), indent=2))
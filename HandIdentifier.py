@@ -1,19 +1,7 @@
 from collections import Counter
 from Card import Card
-from enum import Enum
-
-# Enum defining possible poker hand rankings
-class HandType(Enum):
-    HIGH_CARD = 0
-    PAIR = 1
-    TWO_PAIR = 2
-    THREE_OF_A_KIND = 3
-    STRAIGHT = 4
-    FLUSH = 5
-    FULL_HOUSE = 6
-    FOUR_OF_A_KIND = 7
-    STRAIGHT_FLUSH = 8
-    ROYAL_FLUSH = 9
+from HandType import HandType
+from Evaluator import evaluate, handTypeOf
 
 class HandIdentifier:
     """
@@ -21,25 +9,43 @@ class HandIdentifier:
     """
     def __init__(self, cards: list[Card]) -> None:
         """
-        Accepts 7 cards (e.g., 2 hole cards + 5 community cards),
+        Accepts 5 to 7 cards (e.g., 2 hole cards + 5 community cards),
         and identifies the best possible 5-card poker hand.
+        The type and strength come from the Evaluator lookup tables; the five
+        cards of mainHand are only worked out when first asked for.
         """
         self.cards = cards
-        self.type = HandType.HIGH_CARD #Represents the type of the best hand
-        self.mainHand = [] #Represents the best 5 card hand 
-        self.identifyHand()
+        self.strength = evaluate(cards) #Comparable key, higher is a better hand
+        self.type = handTypeOf(self.strength) #Represents the type of the best hand
+        self._mainHand = None #Represents the best 5 card hand, built on demand
+
+    @property
+    def mainHand(self) -> list[Card]:
+        """The five cards that make up the best hand, built on first access."""
+        if self._mainHand is None:
+            self.identifyHand()
+        return self._mainHand
+
+    @mainHand.setter
+    def mainHand(self, cards: list[Card]) -> None:
+        self._mainHand = cards
 
     def identifyHand(self):
         """
-        Main logic flow for hand evaluation.
+        Main logic flow for building the best five cards.
         Checks pair-related hands first, then flush/straight-related hands.
+        The type found by the Evaluator is kept.
         """
+        handType = self.type
+        self.type = HandType.HIGH_CARD
+        self._mainHand = []
         self.checkForPairHands()
         self.checkForFlushStraightHands()
 
          # Default fallback if no stronger hand found
         if self.type == HandType.HIGH_CARD:
             self.mainHand = self.cards[:5]
+        self.type = handType
 
     def checkForPairHands(self) -> None:
         """
@@ -219,8 +225,14 @@ class HandIdentifier:
         """Returns the five cards that make up the best hand."""
         return self.mainHand
 
+    def getStrength(self) -> int:
+        """Returns the Evaluator strength of the hand; higher beats lower."""
+        return self.strength
+
     def __eq__(self, handIdentifier: object) -> bool:
         """Equality comparison based on hand type and card values."""
+        if isinstance(handIdentifier, HandIdentifier):
+            return self.strength == handIdentifier.strength
         if handIdentifier.getType() != self.type:
             return False
         otherHand = handIdentifier.getMainHand()
@@ -231,6 +243,8 @@ class HandIdentifier:
 
     def __gt__(self, handIndentifier: object) -> bool:
         """Greater-than comparison between two poker hands."""
+        if isinstance(handIndentifier, HandIdentifier):
+            return self.strength > handIndentifier.strength
         otherHandValue = handIndentifier.getType().value
         if self.type.value > otherHandValue: 
             return True 
@@ -241,6 +255,8 @@ class HandIdentifier:
         for i in range(5):
             if self.mainHand[i].getValue() > otherHand[i].getValue():
                 return True
+            if self.mainHand[i].getValue() < otherHand[i].getValue():
+                return False
         return False
 
     def __repr__(self) -> str:
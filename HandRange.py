@@ -0,0 +1,285 @@
+"""
+Weighted opponent hand ranges such as "QQ+, AKs, AQo:0.5, A2s-A5s, AsKd".
+
+A range is expanded once into parallel lists of two-card combos (Card.index
+pairs), weights and 52-bit card masks, so sampling a hand consistent with the
+dead cards is a weighted pick plus mask tests rather than a rejection loop.
+"""
+
+from array import array
+from bisect import bisect
+from itertools import accumulate, combinations
+from random import Random
+import re
+from Card import Card, parseCard, rankChars
+
+handPattern = re.compile(r'^([2-9TJQKA])([2-9TJQKA])([SO]?)(\+?)$')
+spanPattern = re.compile(r'^([2-9TJQKA])([2-9TJQKA])([SO]?)-([2-9TJQKA])([2-9TJQKA])([SO]?)$')
+
+class HandRange:
+    """
+    A weighted set of two-card starting hands for one opponent.
+    """
+
+    def __init__(self, rangeStr: str) -> None:
+        """
+        Parses a comma separated range. Each entry is a specific hand ('AsKd'),
+        a pair ('QQ', 'QQ+', 'QQ-88') or an unpaired hand ('AK', 'AKs', 'AKo',
+        'ATs+', 'A2s-A5s'), optionally followed by ':weight' (default 1).
+        Later entries override the weight of earlier ones.
+        Raises ValueError for entries that cannot be parsed or an empty range.
+        """
+        self.rangeStr = rangeStr
+        comboWeights = {}
+        for token in rangeStr.split(','):
+            token = token.strip()
+            if not token:
+                continue
+            handStr, _, weightStr = token.partition(':')
+            weight = float(weightStr) if weightStr else 1.0
+            for combo in expandHand(handStr.strip()):
+                comboWeights[combo] = weight
+
+        self.combos = [combo for combo, weight in comboWeights.items() if weight > 0]
+        self.weights = [comboWeights[combo] for combo in self.combos]
+        self.masks = [(1 << first) | (1 << second) for first, second in self.combos]
+        if not self.combos:
+            raise ValueError(f"Range {rangeStr!r} contains no hands")
+
+    def available(self, deadMask: int) -> tuple[list[tuple[int, int]], list[float], list[int]]:
+        """
+        Returns the (combos, cumulativeWeights, masks) of the hands that do not use
+        any card in deadMask. Raises ValueError if none are left.
+        """
+        keep = [i for i, mask in enumerate(self.masks) if not mask & deadMask]
+        if not keep:
+            raise ValueError(f"Range {self.rangeStr!r} has no hands left once the known cards are removed")
+        combos = [self.combos[i] for i in keep]
+        return combos, list(accumulate(self.weights[i] for i in keep)), [self.masks[i] for i in keep]
+
+    def __repr__(self) -> str:
+        """Returns the range string and its number of combos."""
+        return f"HandRange({self.rangeStr!r}, {len(self.combos)} combos)"
+
+class JointRangeSampler:
+    """
+    Draws one combo from each of several ranges (as returned by
+    HandRange.available) so that no two share a card. Every such set is drawn
+    with probability proportional to the product of its weights, without
+    redrawing: the ranges are sampled in turn, each combo weighted by the total
+    weight of the legal completions of the ranges after it.
+    The completion weights of the last two ranges take one pass over a range;
+    earlier ranges multiply that by the number of their combos, so four or
+    more wide ranges are slow to set up.
+    """
+
+    def __init__(self, rangeCombos: list[tuple[list, list, list]]) -> None:
+        """
+        Prepares the per-range weights and masks. Completion weights are
+        worked out on first use and cached by the dead cards they depend on.
+        """
+        self.numRanges = len(rangeCombos)
+        self.ranges = [
+            (cumWeights, masks, [weight - previous for weight, previous in zip(cumWeights, [0.0] + cumWeights)])
+            for _, cumWeights, masks in rangeCombos
+        ]
+        #Per range: the cards any range from it onwards can use
+        self.restMasks = [0] * (self.numRanges + 1)
+        for i in range(self.numRanges - 1, -1, -1):
+            self.restMasks[i] = self.restMasks[i + 1]
+            for mask in self.ranges[i][1]:
+                self.restMasks[i] |= mask
+        #Per range: deadMask -> total completion weight, and -> (positions, cumulativeWeights)
+        self.completions = [{} for _ in range(self.numRanges)]
+        self.distributions = [{} for _ in range(self.numRanges)]
+
+        #The last range's weight avoiding some dead cards comes from its total,
+        #per-card and per-pair weights by inclusion-exclusion (see lastWeight)
+        self.lastTotal = 0.0
+        self.lastCardWeights = [0.0] * 52
+        self.lastPairWeights = [[0.0] * 52 for _ in range(52)]
+        if rangeCombos:
+            _, masks, weights = self.ranges[-1]
+            self.lastTotal = sum(weights)
+            for mask, weight in zip(masks, weights):
+                first, second = maskCards(mask)
+                self.lastCardWeights[first] += weight
+                self.lastCardWeights[second] += weight
+                self.lastPairWeights[first][second] += weight
+                self.lastPairWeights[second][first] += weight
+        #The second to last range's combos as (mask, weight, first, second, last range weight of the same combo)
+        self.secondLast = []
+        if self.numRanges >= 2:
+            _, masks, weights = self.ranges[-2]
+            for mask, weight in zip(masks, weights):
+                first, second = maskCards(mask)
+                self.secondLast.append((mask, weight, first, second, self.lastPairWeights[first][second]))
+
+    def lastWeight(self, deadMask: int) -> float:
+        """
+        Returns the weight of the last range's combos that avoid deadMask, by
+        inclusion-exclusion: the total, less the combos using each dead card,
+        plus those using two of them (counted twice).
+        """
+        cards = maskCards(deadMask)
+        total = self.lastTotal - sum(self.lastCardWeights[card] for card in cards)
+        for first, second in combinations(cards, 2):
+            total += self.lastPairWeights[first][second]
+        #Rounding can leave a tiny remainder where nothing is left
+        return total if total > self.lastTotal * 1e-9 else 0.0
+
+    def secondLastWeights(self, deadMask: int) -> list[float]:
+        """
+        Returns, per combo of the second to last range, its weight times the
+        last range's weight avoiding deadMask and that combo (0 if the combo
+        uses a dead card). Adding the combo's cards to lastWeight's sums only
+        takes per-card terms, so this is one pass over the range.
+        """
+        lastWeight = self.lastWeight(deadMask)
+        terms = [-weight for weight in self.lastCardWeights]
+        for card in maskCards(deadMask):
+            terms = [term + pairWeight for term, pairWeight in zip(terms, self.lastPairWeights[card])]
+        threshold = self.lastTotal * 1e-9
+        weights = []
+        for mask, weight, first, second, pairWeight in self.secondLast:
+            completion = lastWeight + pairWeight + terms[first] + terms[second]
+            weights.append(weight * completion if completion > threshold and not mask & deadMask else 0.0)
+        return weights
+
+    def completionWeight(self, index: int, deadMask: int = 0) -> float:
+        """
+        Returns the total weight (sum of weight products) of every way to deal
+        ranges index onwards without sharing a card or using deadMask.
+        """
+        if index == self.numRanges:
+            return 1.0
+        deadMask &= self.restMasks[index]
+        if index == self.numRanges - 1:
+            return self.lastWeight(deadMask)
+        cache = self.completions[index]
+        total = cache.get(deadMask)
+        if total is None:
+            if index == self.numRanges - 2:
+                total = sum(self.secondLastWeights(deadMask))
+            else:
+                _, masks, weights = self.ranges[index]
+                total = 0.0
+                for mask, weight in zip(masks, weights):
+                    if not mask & deadMask:
+                        total += weight * self.completionWeight(index + 1, deadMask | mask)
+            cache[deadMask] = total
+        return total
+
+    def distribution(self, index: int, deadMask: int) -> tuple[array, array]:
+        """
+        Returns the (positions, cumulativeWeights) of range index's combos that
+        avoid deadMask, each weighted by the completions it leaves for the
+        ranges after it.
+        """
+        deadMask &= self.restMasks[index]
+        cache = self.distributions[index]
+        entry = cache.get(deadMask)
+        if entry is None:
+            if index == self.numRanges - 2:
+                weights = self.secondLastWeights(deadMask)
+            else:
+                _, masks, rangeWeights = self.ranges[index]
+                weights = [0.0 if mask & deadMask else weight * self.completionWeight(index + 1, deadMask | mask) for mask, weight in zip(masks, rangeWeights)]
+            positions = array('H', [position for position, weight in enumerate(weights) if weight > 0])
+            entry = cache[deadMask] = (positions, array('d', accumulate(weights[position] for position in positions)))
+        return entry
+
+    def hasDeal(self) -> bool:
+        """Returns True if one hand can be dealt from every range at once."""
+        return self.completionWeight(0) > 0
+
+    def sample(self, rng: Random) -> list[int]:
+        """
+        Returns the position of one combo in each range. The ranges must have
+        at least one legal deal (see hasDeal).
+        """
+        rand = rng.random
+        sampled = []
+        deadMask = 0
+        for index in range(self.numRanges - 1):
+            positions, cumWeights = self.distribution(index, deadMask)
+            position = positions[min(bisect(cumWeights, rand() * cumWeights[-1]), len(positions) - 1)]
+            sampled.append(position)
+            deadMask |= self.ranges[index][1][position]
+        if self.numRanges:
+            sampled.append(sampleCombo(rand, *self.ranges[-1], deadMask))
+        return sampled
+
+def sampleCombo(rand, cumWeights: list[float], masks: list[int], weights: list[float], deadMask: int) -> int:
+    """
+    Picks a combo with probability proportional to its weight among those that
+    avoid deadMask and returns its position. Draws once from the whole range
+    and, only if that hand collides with a dead card, once from the hands
+    that do not, which together give exactly the conditional distribution.
+    """
+    position = min(bisect(cumWeights, rand() * cumWeights[-1]), len(masks) - 1)
+    if not masks[position] & deadMask:
+        return position
+    keep = [i for i, mask in enumerate(masks) if not mask & deadMask]
+    keepWeights = list(accumulate(weights[i] for i in keep))
+    return keep[min(bisect(keepWeights, rand() * keepWeights[-1]), len(keep) - 1)]
+
+def maskCards(mask: int) -> list[int]:
+    """Returns the Card.index values set in a card mask, lowest first."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+def expandHand(handStr: str) -> list[tuple[int, int]]:
+    """
+    Expands one range entry (without weight) into its (Card.index, Card.index) combos,
+    with the higher index first.
+    """
+    if len(handStr) == 4 and handStr[1].upper() in 'CDHS' and handStr[3].upper() in 'CDHS':
+        first, second = parseCard(handStr[:2]), parseCard(handStr[2:])
+        if first is second:
+            raise ValueError(f"Invalid hand {handStr!r}")
+        return [tuple(sorted((first.index, second.index), reverse=True))]
+
+    normalized = handStr.upper()
+    match = handPattern.match(normalized)
+    if match:
+        high, low, kind, plus = match.groups()
+        highRank, lowRank = rankChars.index(high), rankChars.index(low)
+        if highRank == lowRank:
+            top = 12 if plus else highRank
+            return [combo for rank in range(highRank, top + 1) for combo in rankCombos(rank, rank, '')]
+        highRank, lowRank = max(highRank, lowRank), min(highRank, lowRank)
+        top = highRank - 1 if plus else lowRank
+        return [combo for kicker in range(lowRank, top + 1) for combo in rankCombos(highRank, kicker, kind)]
+
+    match = spanPattern.match(normalized)
+    if match:
+        high1, low1, kind1, high2, low2, kind2 = match.groups()
+        ranks = [rankChars.index(rank) for rank in (high1, low1, high2, low2)]
+        if kind1 == kind2 and ranks[0] == ranks[1] and ranks[2] == ranks[3]:
+            return [combo for rank in range(min(ranks), max(ranks) + 1) for combo in rankCombos(rank, rank, '')]
+        if kind1 == kind2 and ranks[0] == ranks[2] and ranks[0] > max(ranks[1], ranks[3]):
+            return [combo for kicker in range(min(ranks[1], ranks[3]), max(ranks[1], ranks[3]) + 1) for combo in rankCombos(ranks[0], kicker, kind1)]
+
+    raise ValueError(f"Invalid hand {handStr!r}")
+
+def rankCombos(highRank: int, lowRank: int, kind: str) -> list[tuple[int, int]]:
+    """
+    Returns the combos of two ranks (rank indices as in Card.rankChars). kind is
+    'S' for suited, 'O' for offsuit or '' for both; pairs ignore kind.
+    """
+    if highRank == lowRank:
+        return [(highRank * 4 + second, highRank * 4 + first) for first, second in combinations(range(4), 2)]
+    return [
+        (highRank * 4 + highSuit, lowRank * 4 + lowSuit)
+        for highSuit in range(4) for lowSuit in range(4)
+        if (kind != 'S' or highSuit == lowSuit) and (kind != 'O' or highSuit != lowSuit)
+    ]
+
+def comboCards(combo: tuple[int, int]) -> list[Card]:
+    """Returns the two cards of a combo."""
+    return [Card.fromIndex(combo[0]), Card.fromIndex(combo[1])]
@@ -0,0 +1,130 @@
+"""
+Persistent equity cache in an SQLite database, shared by every process that
+opens the same file.
+
+It has the same get/put interface as EquityCache, so it can be passed to
+Simulation.runUntil(cache=...): a later run loads a cached entry and tops it
+up to higher precision instead of starting over. Entries are keyed by the
+suit-canonical query key and also store the equity and standard error.
+
+The database runs in WAL mode, so readers in any number of processes do not
+block each other or a writer. When two processes store the same key, the
+entry with more trials (or an exact one) is kept.
+"""
+
+from math import sqrt
+import os
+import sqlite3
+import threading
+
+schema = '''
+CREATE TABLE IF NOT EXISTS equity (
+    key TEXT PRIMARY KEY,
+    wins INTEGER NOT NULL,
+    ties INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    numSims INTEGER NOT NULL,
+    exact INTEGER NOT NULL,
+    equity REAL NOT NULL,
+    standardError REAL NOT NULL
+)
+'''
+
+# Replaces a stored entry only if the new one is exact or has more trials
+upsertQuery = '''
+INSERT INTO equity (key, wins, ties, losses, numSims, exact, equity, standardError)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    wins = excluded.wins, ties = excluded.ties, losses = excluded.losses,
+    numSims = excluded.numSims, exact = excluded.exact,
+    equity = excluded.equity, standardError = excluded.standardError
+WHERE NOT equity.exact AND (excluded.exact OR excluded.numSims > equity.numSims)
+'''
+
+class PersistentCache:
+    """
+    Equity cache backed by an SQLite file. Values are the (wins, ties,
+    losses, numSims, exact) stats of a Simulation, as in EquityCache.
+    Each process and thread opens its own connection on first use, so an
+    instance can be pickled and handed to worker processes.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0) -> None:
+        """
+        Opens (creating if needed) the cache database at path. timeout is how
+        many seconds a write waits for another process's write to finish.
+        """
+        self.path = path
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.local = threading.local()
+        self.connect().close()
+
+    def connect(self) -> sqlite3.Connection:
+        """Opens a new connection in WAL mode and makes sure the table exists."""
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(schema)
+        return connection
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns this thread's connection, opening it on first use in each process."""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = self.local.connection = self.connect()
+            self.local.pid = os.getpid()
+        return connection
+
+    def get(self, key: tuple) -> tuple:
+        """
+        Returns the cached (wins, ties, losses, numSims, exact) for key,
+        or None on a miss.
+        """
+        row = self.connection().execute('SELECT wins, ties, losses, numSims, exact FROM equity WHERE key = ?', (repr(key),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        wins, ties, losses, numSims, exact = row
+        return wins, ties, losses, numSims, bool(exact)
+
+    def put(self, key: tuple, entry: tuple) -> None:
+        """
+        Stores a result unless the database already holds an exact one or one
+        with at least as many trials.
+        """
+        wins, ties, losses, numSims, exact = entry
+        equity = wins / numSims if numSims else 0.0
+        standardError = 0.0 if exact or not numSims else sqrt(equity * (1 - equity) / numSims)
+        self.connection().execute(upsertQuery, (repr(key), wins, ties, losses, numSims, int(exact), equity, standardError))
+        self.puts += 1
+
+    def stats(self) -> dict:
+        """
+        Returns this instance's hit, miss and put counts and the number of
+        entries in the database.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'puts': self.puts,
+            'size': len(self),
+            'path': self.path,
+        }
+
+    def __len__(self) -> int:
+        """Returns the number of cached results in the database."""
+        return self.connection().execute('SELECT COUNT(*) FROM equity').fetchone()[0]
+
+    def __getstate__(self) -> dict:
+        """Pickles the settings and counters but not the open connections."""
+        state = self.__dict__.copy()
+        del state['local']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.local = threading.local()
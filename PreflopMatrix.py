@@ -0,0 +1,245 @@
+"""
+Heads-up preflop equity matrix for the 169 starting hands.
+
+Entry [i][j] holds the win and tie fractions of starting hand i against
+starting hand j (indexed as in PreflopTable), averaged over every pair of
+their combos that share no card and enumerated exactly over all 1,712,304
+boards. Win and tie follow Simulation: a higher strength wins, equal strengths tie.
+
+Suit isomorphism keeps the work down: hand i is fixed to one representative
+combo, the combos of hand j are grouped into orbits under the suit
+permutations that leave that representative unchanged, and each orbit is
+enumerated once. Entry [j][i] follows from [i][j].
+
+File layout: a 16-byte header (magic, version, number of hands, entries
+filled) followed by the float32 win matrix and the float32 tie matrix,
+row-major. Matrices are read through mmap. Range-vs-range equity is then a
+weighted sum of lookups (see PreflopMatrix.rangeEquity).
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import permutations
+import argparse
+import mmap
+import os
+import struct
+from Card import Card
+from Evaluator import cardPrimes, cardSuitKeys, evaluateIndices, flushSuitTable, rankTable
+from HandRange import HandRange, expandHand
+from PreflopTable import numStartingHands, representativeHand, startingHandIndex, startingHandName
+
+matrixMagic = b'PFHU'
+matrixVersion = 1
+headerFormat = '<4sHHI4x'
+headerSize = struct.calcsize(headerFormat)
+numEntries = numStartingHands * numStartingHands
+
+defaultMatrixPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_matrix.bin')
+
+suitPermutations = list(permutations(range(4)))
+
+def permuteCard(index: int, perm: tuple[int, ...]) -> int:
+    """Returns the Card.index of a card with its suit relabelled by perm."""
+    return index - (index & 3) + perm[index & 3]
+
+def villainOrbits(hero: tuple[int, int], villainCombos: list[tuple[int, int]]) -> list[tuple[tuple[int, int], int]]:
+    """
+    Groups the villain combos that share no card with hero into orbits under
+    the suit permutations that map hero onto itself. Returns one
+    (representative combo, orbit size) per orbit.
+    """
+    heroSet = set(hero)
+    stabilizer = [perm for perm in suitPermutations if {permuteCard(card, perm) for card in hero} == heroSet]
+    orbits = {}
+    for combo in villainCombos:
+        if heroSet.intersection(combo):
+            continue
+        canonical = min(tuple(sorted(permuteCard(card, perm) for card in combo)) for perm in stabilizer)
+        orbits[canonical] = orbits.get(canonical, 0) + 1
+    return list(orbits.items())
+
+def enumerateMatchup(hero: list[int], villain: list[int]) -> tuple[int, int, int]:
+    """
+    Scores two hands (Card.index pairs) on every board of the remaining
+    cards and returns (hero wins, ties, boards). Boards are walked in nested
+    loops that carry the rank prime product and suit key, so a board without
+    a possible flush costs one rankTable lookup per hand.
+    """
+    dead = set(hero) | set(villain)
+    live = [card for card in range(52) if card not in dead]
+    primes = [cardPrimes[card] for card in live]
+    keys = [cardSuitKeys[card] for card in live]
+    heroProduct = cardPrimes[hero[0]] * cardPrimes[hero[1]]
+    villainProduct = cardPrimes[villain[0]] * cardPrimes[villain[1]]
+    heroKey = cardSuitKeys[hero[0]] + cardSuitKeys[hero[1]]
+    villainKey = cardSuitKeys[villain[0]] + cardSuitKeys[villain[1]]
+    flushSuits = flushSuitTable
+    ranks = rankTable
+    numLive = len(live)
+    wins = ties = total = 0
+    for a in range(numLive - 4):
+        productA, keyA = primes[a], keys[a]
+        for b in range(a + 1, numLive - 3):
+            productB, keyB = productA * primes[b], keyA + keys[b]
+            for c in range(b + 1, numLive - 2):
+                productC, keyC = productB * primes[c], keyB + keys[c]
+                for d in range(c + 1, numLive - 1):
+                    productD, keyD = productC * primes[d], keyC + keys[d]
+                    heroKeyD, villainKeyD = keyD + heroKey, keyD + villainKey
+                    for e in range(d + 1, numLive):
+                        key = keys[e]
+                        if flushSuits[heroKeyD + key] >= 0 or flushSuits[villainKeyD + key] >= 0:
+                            board = [live[a], live[b], live[c], live[d], live[e]]
+                            heroStrength = evaluateIndices(hero + board)
+                            villainStrength = evaluateIndices(villain + board)
+                        else:
+                            product = productD * primes[e]
+                            heroStrength = ranks[product * heroProduct]
+                            villainStrength = ranks[product * villainProduct]
+                        if heroStrength > villainStrength:
+                            wins += 1
+                        elif heroStrength == villainStrength:
+                            ties += 1
+                        total += 1
+    return wins, ties, total
+
+def computeEntry(heroIndex: int, villainIndex: int) -> tuple[int, int, float, float]:
+    """
+    Worker entry point: returns (heroIndex, villainIndex, win, tie) for one
+    matrix entry, enumerating each villain orbit once.
+    """
+    hero = [card.index for card in representativeHand(heroIndex)]
+    wins = ties = total = 0
+    for villain, count in villainOrbits(tuple(hero), expandHand(startingHandName(villainIndex))):
+        orbitWins, orbitTies, orbitTotal = enumerateMatchup(hero, list(villain))
+        wins += count * orbitWins
+        ties += count * orbitTies
+        total += count * orbitTotal
+    return heroIndex, villainIndex, wins / total, ties / total
+
+def loadCheckpoint(path: str) -> dict[tuple[int, int], tuple[float, float]]:
+    """
+    Returns the entries saved in a checkpoint file, one 'i j win tie' line
+    each. A partly written last line is ignored.
+    """
+    entries = {}
+    if path is None or not os.path.exists(path):
+        return entries
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) == 4 and line.endswith('\n'):
+                entries[int(fields[0]), int(fields[1])] = float(fields[2]), float(fields[3])
+    return entries
+
+def generateMatrix(path: str = defaultMatrixPath, checkpointPath: str = None, numWorkers: int = None) -> None:
+    """
+    Computes every entry with i <= j across a process pool, derives the rest
+    by symmetry and writes the matrix file to path. Finished entries are
+    appended to checkpointPath (default: path + '.checkpoint') as they come
+    in, and entries already there are not recomputed.
+    """
+    checkpointPath = checkpointPath or path + '.checkpoint'
+    numWorkers = numWorkers or os.cpu_count() or 1
+    entries = loadCheckpoint(checkpointPath)
+    tasks = [(i, j) for i in range(numStartingHands) for j in range(i, numStartingHands) if (i, j) not in entries]
+
+    with open(checkpointPath, 'a+') as checkpoint, ProcessPoolExecutor(max_workers=numWorkers) as executor:
+        # Start a fresh line if the last run stopped partway through one
+        if checkpoint.tell():
+            checkpoint.seek(checkpoint.tell() - 1)
+            if checkpoint.read(1) != '\n':
+                checkpoint.write('\n')
+        futures = [executor.submit(computeEntry, i, j) for i, j in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            i, j, win, tie = future.result()
+            entries[i, j] = win, tie
+            checkpoint.write(f"{i} {j} {win!r} {tie!r}\n")
+            checkpoint.flush()
+            if done % numStartingHands == 0 or done == len(futures):
+                print(f"{len(entries)} / {numStartingHands * (numStartingHands + 1) // 2} entries")
+
+    wins = array('f', [0.0]) * numEntries
+    ties = array('f', [0.0]) * numEntries
+    for (i, j), (win, tie) in entries.items():
+        wins[i * numStartingHands + j], ties[i * numStartingHands + j] = win, tie
+        wins[j * numStartingHands + i], ties[j * numStartingHands + i] = 1.0 - win - tie, tie
+
+    tempPath = path + '.tmp'
+    with open(tempPath, 'wb') as file:
+        file.write(struct.pack(headerFormat, matrixMagic, matrixVersion, numStartingHands, numEntries))
+        wins.tofile(file)
+        ties.tofile(file)
+    os.replace(tempPath, path)
+
+class PreflopMatrix:
+    """
+    Read-only, memory mapped view of a heads-up matrix written by generateMatrix.
+    """
+
+    def __init__(self, path: str = defaultMatrixPath) -> None:
+        """
+        Opens and maps the matrix file.
+        Raises ValueError if the file is not a complete heads-up matrix.
+        """
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, numHands, filled = struct.unpack_from(headerFormat, self.map)
+        if magic != matrixMagic or version != matrixVersion or numHands != numStartingHands or filled != numEntries:
+            raise ValueError(f"{path} is not a complete version {matrixVersion} heads-up matrix")
+        self.values = memoryview(self.map)[headerSize:headerSize + 2 * numEntries * 4].cast('f')
+        self.wins = self.values[:numEntries]
+        self.ties = self.values[numEntries:]
+
+    def lookup(self, heroIndex: int, villainIndex: int) -> tuple[float, float]:
+        """Returns the (win, tie) fractions of starting hand heroIndex against villainIndex."""
+        offset = heroIndex * numStartingHands + villainIndex
+        return self.wins[offset], self.ties[offset]
+
+    def handEquity(self, heroHand: list[Card], villainHand: list[Card]) -> tuple[float, float]:
+        """
+        Returns the (win, tie) fractions of two hands' starting hand classes,
+        averaged over the suit combinations of both.
+        """
+        return self.lookup(startingHandIndex(*heroHand), startingHandIndex(*villainHand))
+
+    def rangeEquity(self, heroRange: HandRange, villainRange: HandRange) -> tuple[float, float]:
+        """
+        Returns the (win, tie) fractions of heroRange against villainRange:
+        the matrix entries of every pair of combos that share no card,
+        weighted by the product of their range weights.
+        Raises ValueError if no such pair exists.
+        """
+        villains = [
+            (weight, mask, startingHandIndex(Card.fromIndex(first), Card.fromIndex(second)))
+            for (first, second), weight, mask in zip(villainRange.combos, villainRange.weights, villainRange.masks)
+        ]
+        totalWeight = win = tie = 0.0
+        for (first, second), heroWeight, heroMask in zip(heroRange.combos, heroRange.weights, heroRange.masks):
+            row = startingHandIndex(Card.fromIndex(first), Card.fromIndex(second)) * numStartingHands
+            for villainWeight, villainMask, column in villains:
+                if heroMask & villainMask:
+                    continue
+                weight = heroWeight * villainWeight
+                totalWeight += weight
+                win += weight * self.wins[row + column]
+                tie += weight * self.ties[row + column]
+        if not totalWeight:
+            raise ValueError("The ranges have no pair of hands without a shared card")
+        return win / totalWeight, tie / totalWeight
+
+    def close(self) -> None:
+        """Releases the memory map."""
+        self.wins.release()
+        self.ties.release()
+        self.values.release()
+        self.map.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the exact heads-up preflop equity matrix.")
+    parser.add_argument('--out', default=defaultMatrixPath, help="output file")
+    parser.add_argument('--checkpoint', default=None, help="checkpoint file (default: output file + '.checkpoint')")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    generateMatrix(args.out, args.checkpoint, args.workers)
@@ -0,0 +1,130 @@
+"""
+Precomputed preflop equity for the 169 suit-isomorphic starting hands against
+1 to maxOpps random opponents.
+
+Starting hands are indexed like a 13 x 13 grid (row * 13 + col, ranks as in
+Card.rankChars): pairs sit on the diagonal, suited hands at (high, low) and
+offsuit hands at (low, high).
+
+File layout: a 16-byte header (magic, version, number of hands, maxOpps,
+trials per entry) followed by float32 (win, tie) fractions for every hand and
+opponent count, in hand-major order. Tables are read through mmap.
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import mmap
+import os
+import struct
+from Card import Card, cardsByIndex, rankChars
+
+tableMagic = b'PFEQ'
+tableVersion = 1
+headerFormat = '<4sHHHxxI'
+headerSize = struct.calcsize(headerFormat)
+numStartingHands = 169
+
+defaultTablePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.bin')
+
+def startingHandIndex(card1: Card, card2: Card) -> int:
+    """Returns the 0-168 starting hand index of two hole cards."""
+    high, low = sorted((card1.value - 2, card2.value - 2), reverse=True)
+    if card1.suit == card2.suit:
+        return high * 13 + low
+    return low * 13 + high
+
+def startingHandName(index: int) -> str:
+    """Returns the name of a starting hand index, e.g. 'AA', 'AKs' or 'AKo'."""
+    row, col = divmod(index, 13)
+    if row == col:
+        return rankChars[row] * 2
+    if row > col:
+        return f"{rankChars[row]}{rankChars[col]}s"
+    return f"{rankChars[col]}{rankChars[row]}o"
+
+def representativeHand(index: int) -> list[Card]:
+    """Returns one concrete pair of hole cards for a starting hand index."""
+    row, col = divmod(index, 13)
+    high, low = max(row, col), min(row, col)
+    # Card.index is rank * 4 + suit; suited hands share suit 0, the others use suits 0 and 1
+    return [cardsByIndex[high * 4], cardsByIndex[low * 4 + (0 if row > col else 1)]]
+
+class PreflopTable:
+    """
+    Read-only view of a preflop equity table file, memory mapped so lookups
+    do not load or parse the whole file.
+    """
+
+    def __init__(self, path: str = defaultTablePath) -> None:
+        """
+        Opens and maps a table written by generateTable.
+        Raises ValueError if the file is not a preflop equity table.
+        """
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, numHands, self.maxOpps, self.trialsPerEntry = struct.unpack_from(headerFormat, self.map)
+        if magic != tableMagic or version != tableVersion or numHands != numStartingHands:
+            raise ValueError(f"{path} is not a version {tableVersion} preflop equity table")
+        self.values = memoryview(self.map)[headerSize:headerSize + numHands * self.maxOpps * 2 * 4].cast('f')
+
+    def lookup(self, playerHand: list[Card], numOpps: int) -> tuple[float, float]:
+        """
+        Returns the (win, tie) fractions for the hole cards against numOpps random
+        opponents, or None if numOpps is outside the table.
+        """
+        if not 1 <= numOpps <= self.maxOpps:
+            return None
+        offset = (startingHandIndex(playerHand[0], playerHand[1]) * self.maxOpps + numOpps - 1) * 2
+        return self.values[offset], self.values[offset + 1]
+
+    def close(self) -> None:
+        """Releases the memory map."""
+        self.values.release()
+        self.map.close()
+
+_defaultTable = None
+
+def loadDefaultTable() -> PreflopTable:
+    """
+    Returns the table at defaultTablePath, opened once per process, or None if
+    no table has been generated.
+    """
+    global _defaultTable
+    if _defaultTable is None and os.path.exists(defaultTablePath):
+        _defaultTable = PreflopTable(defaultTablePath)
+    return _defaultTable
+
+def generateTable(path: str = defaultTablePath, trialsPerEntry: int = 1000000, maxOpps: int = 9, numWorkers: int = None, seed: int = 0) -> None:
+    """
+    Simulates every starting hand against 1 to maxOpps random opponents with
+    trialsPerEntry rounds each, spread over a process pool, and writes the table
+    to path. The file is written to a temporary name and renamed into place.
+    """
+    from Simulation import Simulation
+
+    numWorkers = numWorkers or os.cpu_count() or 1
+    values = array('f')
+    with ProcessPoolExecutor(max_workers=numWorkers) as executor:
+        for index in range(numStartingHands):
+            for numOpps in range(1, maxOpps + 1):
+                sim = Simulation(representativeHand(index), numOpps=numOpps)
+                sim.runSimsParallel(trialsPerEntry, numWorkers=numWorkers, seed=seed + index * maxOpps + numOpps, executor=executor)
+                values.extend([sim.wins / sim.numSims, sim.ties / sim.numSims])
+            print(f"{startingHandName(index)}: {[round(values[-2 * maxOpps + 2 * i], 4) for i in range(maxOpps)]}")
+
+    tempPath = path + '.tmp'
+    with open(tempPath, 'wb') as file:
+        file.write(struct.pack(headerFormat, tableMagic, tableVersion, numStartingHands, maxOpps, trialsPerEntry))
+        values.tofile(file)
+    os.replace(tempPath, path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the preflop equity table.")
+    parser.add_argument('--out', default=defaultTablePath, help="output file")
+    parser.add_argument('--trials', type=int, default=1000000, help="simulated rounds per hand and opponent count")
+    parser.add_argument('--max-opps', type=int, default=9, help="largest number of opponents in the table")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0, help="base random seed")
+    args = parser.parse_args()
+    generateTable(args.out, args.trials, args.max_opps, args.workers, args.seed)
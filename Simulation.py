@@ -1,6 +1,23 @@
-from HandIdentifier import HandIdentifier, HandType
-from Deck import Deck
+from array import array
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+import asyncio
+import cProfile
+from itertools import combinations
+from math import comb, sqrt
+from statistics import NormalDist
+import os
+import pstats
+import random
+import time
+from HandIdentifier import HandType
+from Evaluator import boardState, evaluateHole, evaluateOmaha, handTypeOf, omahaBoardState, omahaHoleState
+from Deck import BitmaskDeck
 from Card import Card
+from PreflopTable import PreflopTable, loadDefaultTable
+from EquityCache import EquityCache, canonicalKey
+from HandRange import HandRange, JointRangeSampler, comboCards
+from DealLog import DealRecorder, outcomeOf
 
 #Mapping of HandType enums to string descriptions for output readability
 handStrTable = {
@@ -16,6 +33,34 @@ handStrTable = {
     HandType.ROYAL_FLUSH : "Royal Flush",
 }
 
+#Number of trials dealt and evaluated together by runSims
+simBatchSize = 10000
+
+#Default number of runouts up to which runSims(exact="auto") enumerates instead of sampling
+defaultExactThreshold = 50000
+
+#Methods timed for each phase when a Simulation is instrumented
+phaseMethods = {
+    'reset': ['resetDeck'],
+    'removal': ['removeKnownCardsFromDeck'],
+    'dealing': ['fillAllCards', 'dealTrials'],
+    'evaluation': ['evaluateRound', 'evaluateTrials'],
+    'comparison': ['recordOutcome'],
+}
+
+#Process pool shared by the asyncio API (see getSharedExecutor)
+_sharedExecutor = None
+
+def getSharedExecutor() -> ProcessPoolExecutor:
+    """
+    Returns a process pool created on first use and shared by every
+    asynchronous simulation in this process.
+    """
+    global _sharedExecutor
+    if _sharedExecutor is None:
+        _sharedExecutor = ProcessPoolExecutor()
+    return _sharedExecutor
+
 class Simulation:
 
     """
@@ -23,28 +68,127 @@ class Simulation:
     for a player's hand against a number of opponents by generating random hands or cards that are not accounted for.
     """
 
-    def __init__(self, playerHand: list[Card], knownComCards: list[Card] = [], knownOppCards: list[list[Card]] = [], numOpps: int = 8):
+    def __init__(self, playerHand: list[Card], knownComCards: list[Card] = [], knownOppCards: list[list[Card]] = [], numOpps: int = 8, seed: int = None, exactThreshold: int = defaultExactThreshold, oppRanges: list[HandRange] = [], instrument: bool = False, recorder: DealRecorder = None):
         """
         Initializes the simulation with player's hole cards, any known community
         or opponent cards, and the number of opponents in the game.
+        A seed makes the random deals reproducible, and exactThreshold is the
+        largest number of runouts runSims(exact="auto") will enumerate.
+        oppRanges gives one HandRange per opponent whose hand is drawn from a
+        weighted range; they count towards numOpps like known opponents do.
+        instrument turns on per-phase timing (see stats); when it is off the
+        hot path is untouched.
+        recorder, if given, logs the cards and outcome of every trial sampled
+        in this process by runSim and runSims (see DealLog). Enumerated runouts
+        (runExact) and results loaded from a cache or the preflop table are not
+        logged, and runSimsParallel, iterSimsAsync, runUntilAsync, runStratified
+        and compareSimulations raise ValueError when a recorder is attached.
         """
         
         self.knownComCards = knownComCards
         self.knownOppCards = knownOppCards
+        self.oppRanges = oppRanges
         self.numOpps = numOpps
         self.playerHand = playerHand
 
         self.allComCards = None
         self.allOppCards = None
 
-        self.deck = Deck()
+        self.deck = BitmaskDeck()
+        self.rng = random.Random(seed)
+        self.exactThreshold = exactThreshold
 
         self.wins = 0
         self.losses = 0
         self.ties = 0
         self.numSims = 0
+        self.exact = False #True once the stats hold a full enumeration (see runExact)
 
         self.winningOppHands = []
+
+        #Card indices used by the batched runSims path
+        self.playerIndices = [card.index for card in playerHand]
+        self.comIndices = [card.index for card in knownComCards]
+        self.knownOppIndices = [[card.index for card in hand] for hand in knownOppCards]
+        knownIndices = set(self.playerIndices + self.comIndices)
+        for hand in self.knownOppIndices:
+            knownIndices.update(hand)
+        if len(knownIndices) != len(self.playerIndices) + len(self.comIndices) + sum(len(hand) for hand in self.knownOppIndices):
+            raise ValueError("The same card was passed in more than once as a known card")
+        self.liveCards = [index for index in range(52) if index not in knownIndices]
+        self.knownMask = sum(1 << index for index in knownIndices)
+        self.numComDraws = 5 - len(knownComCards)
+        self.numOppDraws = numOpps - len(knownOppCards) - len(oppRanges)
+        self.dealSize = self.numComDraws + 2 * (len(oppRanges) + self.numOppDraws)
+        #Per range: the (combos, cumulativeWeights, masks) that avoid the known cards
+        self.rangeCombos = [oppRange.available(self.knownMask) for oppRange in oppRanges]
+        self.rangeSampler = JointRangeSampler(self.rangeCombos)
+        if not self.rangeSampler.hasDeal():
+            raise ValueError("Opponent ranges conflict: they cannot all be dealt a hand at once")
+
+        self.recorder = recorder
+        if recorder is not None and recorder.numHands != 1 + numOpps:
+            raise ValueError(f"Recorder expects {recorder.numHands} hands per trial, not {1 + numOpps}")
+        if recorder is not None:
+            self.knownHandBytes = bytes(self.playerIndices + [index for hand in self.knownOppIndices for index in hand])
+
+        #Phase name -> [seconds, calls], or None when not instrumented
+        self.phaseStats = None
+        if instrument:
+            self.instrument()
+
+    def instrument(self):
+        """
+        Wraps each hot-path phase method of this instance with a timer that
+        accumulates its wall-clock time and call count (see stats).
+        """
+        self.phaseStats = {}
+        for phase, methodNames in phaseMethods.items():
+            self.phaseStats[phase] = [0.0, 0]
+            for methodName in methodNames:
+                setattr(self, methodName, self.timePhase(self.phaseStats[phase], getattr(self, methodName)))
+
+    @staticmethod
+    def timePhase(phaseStat: list, method):
+        """Returns method wrapped to add its run time and a call to phaseStat."""
+        perfCounter = time.perf_counter
+        def timed(*args, **kwargs):
+            start = perfCounter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                phaseStat[0] += perfCounter() - start
+                phaseStat[1] += 1
+        return timed
+
+    def stats(self) -> dict:
+        """
+        Returns {phase: {'seconds': total, 'calls': count}} for the deck reset,
+        known-card removal, dealing, evaluation and comparison phases, plus
+        the number of rounds. Empty unless instrumented.
+        """
+        if self.phaseStats is None:
+            return {}
+        phases = {phase: {'seconds': seconds, 'calls': calls} for phase, (seconds, calls) in self.phaseStats.items()}
+        return {'numSims': self.numSims, 'phases': phases}
+
+    def profileSims(self, numSims: int, path: str = None, batched: bool = True) -> pstats.Stats:
+        """
+        Runs numSims rounds (with runSims, or runSim one at a time when batched
+        is False) under cProfile. Dumps the profile to path if given, for
+        loading with pstats, and returns it as a pstats.Stats.
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        if batched:
+            self.runSims(numSims)
+        else:
+            for _ in range(numSims):
+                self.runSim()
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+        return pstats.Stats(profiler)
         
     def runSim(self):
 
@@ -55,33 +199,50 @@ class Simulation:
         - Updates win/loss/tie stats
         """
 
-        self.deck.resetDeck()
-        self.deck.shuffle()
+        self.resetDeck()
         self.removeKnownCardsFromDeck()
         self.fillAllCards()
+        playerStrength, bestOppStrength = self.evaluateRound()
+        self.recordOutcome(playerStrength, bestOppStrength)
+        if self.recorder is not None:
+            cards = self.allComCards + self.playerHand + [card for hand in self.allOppCards for card in hand]
+            self.recorder.write(bytes([card.index for card in cards] + [outcomeOf(playerStrength, bestOppStrength)]))
+
+    def resetDeck(self):
+        """
+        Returns all cards to the deck. No shuffle is needed since cards are
+        drawn at random (see BitmaskDeck.drawCards).
+        """
+        self.deck.resetDeck()
 
-        playerHandID = HandIdentifier(self.playerHand + self.allComCards)
+    def evaluateRound(self) -> tuple[int, int]:
+        """
+        Returns the strength of the player's hand and of the best opponent hand
+        for the cards dealt by fillAllCards.
+        """
+        board = boardState([card.index for card in self.allComCards])
+        playerStrength = evaluateHole(board, self.playerHand[0].index, self.playerHand[1].index)
+        bestOppStrength = max(evaluateHole(board, hand[0].index, hand[1].index) for hand in self.allOppCards)
+        return playerStrength, bestOppStrength
 
-        oppHandIDs = []
-        for hand in self.allOppCards:
-            oppHandID = HandIdentifier(hand + self.allComCards)
-            oppHandIDs.append(oppHandID)
+    def recordOutcome(self, playerStrength: int, bestOppStrength: int, count: int = 1):
+        """
+        Updates win/loss/tie stats with count rounds in which the player's hand
+        strength faced the best opponent's hand strength.
+        """
+        if playerStrength > bestOppStrength:
+            self.wins += count
 
-        bestOppHand = max(oppHandIDs)
+        elif playerStrength == bestOppStrength:
+            self.ties += count
 
-        if playerHandID > bestOppHand:
-            self.wins += 1
-        
-        elif playerHandID == bestOppHand:
-            self.ties += 1
-        
         else:
-            winningOppHandType = handStrTable[bestOppHand.getType()]
+            winningOppHandType = handStrTable[handTypeOf(bestOppStrength)]
             if winningOppHandType not in self.winningOppHands:
                 self.winningOppHands.append(winningOppHandType)
-            self.losses += 1
+            self.losses += count
 
-        self.numSims += 1
+        self.numSims += count
 
     def removeKnownCardsFromDeck(self):
         """
@@ -100,8 +261,30 @@ class Simulation:
         """
         Completes the board and opponent hands by drawing the necessary number of cards.
         """
+        rangeHands = self.drawRangeHands()
         self.allComCards = self.knownComCards + self.drawComCards()
-        self.allOppCards = self.knownOppCards + self.drawOppCards()
+        self.allOppCards = self.knownOppCards + rangeHands + self.drawOppCards()
+
+    def drawRangeHands(self):
+        """
+        Draws one hand from each opponent range, jointly so that no two share a
+        card (see HandRange.JointRangeSampler), and removes them from the deck.
+        """
+        rangeHands = []
+        for (combos, _, _), position in zip(self.rangeCombos, self.rangeSampler.sample(self.rng)):
+            hand = comboCards(combos[position])
+            for card in hand:
+                self.deck.removeCard(card)
+            rangeHands.append(hand)
+        return rangeHands
+
+    def checkNoRecorder(self, runName: str):
+        """
+        Raises ValueError if a recorder is attached, for runs whose trials
+        are dealt elsewhere and so cannot be logged.
+        """
+        if self.recorder is not None:
+            raise ValueError(f"{runName} does not log its trials and cannot be used with a recorder")
 
     def getOutcomes(self):
         """
@@ -109,14 +292,725 @@ class Simulation:
         """
         return self.wins, self.ties, self.losses
 
+    def getEquity(self) -> float:
+        """
+        Returns the current equity estimate (win rate), or 0.0 before any rounds.
+        """
+        return self.wins / self.numSims if self.numSims else 0.0
+
+    def getStandardError(self) -> float:
+        """
+        Returns the standard error of the equity estimate, which is 0.0 for an
+        exact enumeration.
+        """
+        if self.exact or not self.numSims:
+            return 0.0
+        equity = self.getEquity()
+        return sqrt(equity * (1 - equity) / self.numSims)
+
+    def getConfidenceInterval(self, confidence: float = 0.95) -> tuple[float, float]:
+        """
+        Returns the (low, high) normal-approximation confidence interval of the equity.
+        """
+        halfWidth = NormalDist().inv_cdf((1 + confidence) / 2) * self.getStandardError()
+        equity = self.getEquity()
+        return max(0.0, equity - halfWidth), min(1.0, equity + halfWidth)
+
+    def runUntil(self, precision: float = 0.005, confidence: float = 0.95, timeLimit: float = None, maxSims: int = None, batchSize: int = 2000, exact: bool | str = "auto", usePreflopTable: bool = True, cache: EquityCache = None):
+        """
+        Runs batches of simulation rounds until the equity is known to within
+        +/- precision at the given confidence, timeLimit seconds have passed,
+        or maxSims total rounds have been run, whichever comes first.
+        A fresh query is first looked up in cache (keyed by canonicalKey, so
+        suit-isomorphic queries share entries) and then in the preflop equity
+        table (see loadPreflopEquity). A cached result that is not precise
+        enough is topped up rather than recomputed, and a fresh simulation whose
+        runouts can be enumerated (see runSims) is solved exactly instead.
+        Returns (equity, standardError, trialsUsed) where trialsUsed counts the
+        rounds run by this call.
+        """
+        cacheKey = None
+        if cache is not None and self.numSims == 0:
+            cacheKey = self.getCacheKey()
+            entry = cache.get(cacheKey)
+            if entry is not None:
+                self.wins, self.ties, self.losses, self.numSims, self.exact = entry
+        if usePreflopTable and self.numSims == 0:
+            self.loadPreflopEquity()
+        startSims = self.numSims
+        if self.numSims == 0 and self.useExact(exact):
+            self.runExact()
+        elif not self.exact:
+            self.runUntilPrecise(precision, confidence, timeLimit, maxSims, batchSize)
+        if cacheKey is not None and self.numSims != startSims:
+            cache.put(cacheKey, (self.wins, self.ties, self.losses, self.numSims, self.exact))
+        return self.getEquity(), self.getStandardError(), self.numSims - startSims
+
+    def runUntilPrecise(self, precision: float, confidence: float, timeLimit: float, maxSims: int, batchSize: int):
+        """
+        Sampling loop of runUntil: runs batches until the precision target,
+        the time limit or maxSims is reached.
+        """
+        deadline = None if timeLimit is None else time.perf_counter() + timeLimit
+        while True:
+            if self.hasPrecision(precision, confidence):
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if maxSims is not None:
+                batchSize = min(batchSize, maxSims - self.numSims)
+                if batchSize <= 0:
+                    break
+            self.runSims(batchSize)
+
+    def hasPrecision(self, precision: float, confidence: float = 0.95) -> bool:
+        """
+        Checks whether the equity is known to within +/- precision at the given
+        confidence. Uses the Agresti-Coull adjusted estimate, so a run of all
+        wins or all losses does not count as precise too early.
+        """
+        if not self.numSims:
+            return False
+        if self.exact:
+            return True
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        adjustedSims = self.numSims + z * z
+        adjustedEquity = (self.wins + z * z / 2) / adjustedSims
+        return z * sqrt(adjustedEquity * (1 - adjustedEquity) / adjustedSims) <= precision
+
+    def getSnapshot(self, confidence: float = 0.95) -> tuple[float, tuple[float, float], int]:
+        """
+        Returns the running (equity, (low, high) confidence interval, numSims).
+        """
+        return self.getEquity(), self.getConfidenceInterval(confidence), self.numSims
+
+    def iterSims(self, batchSize: int = 2000, maxSims: int = None, precision: float = None, confidence: float = 0.95) -> Iterator[tuple[float, tuple[float, float], int]]:
+        """
+        Runs batches of batchSize rounds and yields a snapshot (see getSnapshot)
+        after each one. Stops after maxSims total rounds or once precision is
+        reached, if given; otherwise runs until the caller stops iterating.
+        """
+        while not (precision is not None and self.hasPrecision(precision, confidence)):
+            if maxSims is not None:
+                batchSize = min(batchSize, maxSims - self.numSims)
+                if batchSize <= 0:
+                    return
+            self.runSims(batchSize)
+            yield self.getSnapshot(confidence)
+
+    async def iterSimsAsync(self, batchSize: int = 20000, maxSims: int = None, precision: float = None, confidence: float = 0.95, executor: Executor = None) -> AsyncIterator[tuple[float, tuple[float, float], int]]:
+        """
+        Asynchronous iterSims: each batch runs as a seeded shard (see runShard)
+        in executor, by default the process pool from getSharedExecutor, so the
+        event loop is never blocked and concurrent queries share the workers.
+        Cancelling the consuming task stops the run after the batch in flight.
+        Raises ValueError if a recorder is attached.
+        """
+        self.checkNoRecorder("iterSimsAsync")
+        loop = asyncio.get_running_loop()
+        executor = executor or getSharedExecutor()
+        while not (precision is not None and self.hasPrecision(precision, confidence)):
+            if maxSims is not None:
+                batchSize = min(batchSize, maxSims - self.numSims)
+                if batchSize <= 0:
+                    return
+            result = await loop.run_in_executor(executor, runShard, self.playerHand, self.knownComCards, self.knownOppCards, self.numOpps, batchSize, self.rng.getrandbits(64), self.oppRanges, self.getShardClass())
+            self.mergeShardResult(result)
+            yield self.getSnapshot(confidence)
+
+    async def runUntilAsync(self, precision: float = 0.005, confidence: float = 0.95, timeLimit: float = None, maxSims: int = None, batchSize: int = 20000, executor: Executor = None) -> tuple[float, float, int]:
+        """
+        Asynchronous runUntil built on iterSimsAsync. Returns (equity,
+        standardError, trialsUsed) once precision, timeLimit or maxSims is reached.
+        """
+        startSims = self.numSims
+        deadline = None if timeLimit is None else time.perf_counter() + timeLimit
+        async for _ in self.iterSimsAsync(batchSize, maxSims, precision, confidence, executor):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return self.getEquity(), self.getStandardError(), self.numSims - startSims
+
+    def getCacheKey(self) -> tuple:
+        """
+        Returns the suit-canonical key of this query (see EquityCache.canonicalKey).
+        """
+        return canonicalKey(self.playerHand, self.knownComCards, self.knownOppCards, self.numOpps, self.oppRanges)
+
+    def loadPreflopEquity(self, table: PreflopTable = None) -> bool:
+        """
+        Answers a preflop query against random opponents (no known community or
+        opponent cards) from a preflop equity table, by default the generated
+        table if there is one. On a hit the win/loss/tie stats are set from the
+        table entry and True is returned.
+        """
+        table = table or loadDefaultTable()
+        if table is None or self.numSims or self.knownComCards or self.knownOppCards or self.oppRanges:
+            return False
+        entry = table.lookup(self.playerHand, self.numOpps)
+        if entry is None:
+            return False
+        win, tie = entry
+        self.numSims = table.trialsPerEntry
+        self.wins = round(win * self.numSims)
+        self.ties = round(tie * self.numSims)
+        self.losses = self.numSims - self.wins - self.ties
+        return True
+
     def drawComCards(self):
         """
         Draws remaining community cards until there are 5 total.
         """
-        return [self.deck.drawTopCard() for _ in range(5 - len(self.knownComCards))]
+        return self.deck.drawCards(self.numComDraws, self.rng)
     
     def drawOppCards(self):
         """
         Draws unknown opponent hands (2 cards per opponent).
         """
-        return [[self.deck.drawTopCard() for _ in range(2)] for _ in range(self.numOpps - len(self.knownOppCards))]
\ No newline at end of file
+        return [self.deck.drawCards(2, self.rng) for _ in range(self.numOppDraws)]
+
+    def runSims(self, numSims: int, exact: bool | str = False):
+        """
+        Runs numSims simulation rounds in batches. Each batch is dealt at once
+        as a flat array of card indices and evaluated in bulk, updating the
+        same win/loss/tie stats as runSim.
+        With exact=True every possible runout is enumerated instead (see runExact),
+        and with exact="auto" that happens only when countRunouts() is at most
+        exactThreshold.
+        """
+        if self.useExact(exact):
+            self.runExact()
+            return
+        remaining = numSims
+        while remaining > 0:
+            count = min(remaining, simBatchSize)
+            self.scoreTrials(self.dealTrials(count), count)
+            remaining -= count
+
+    def useExact(self, exact: bool | str) -> bool:
+        """
+        Decides whether an exact= argument means enumerating (see runSims).
+        Raises ValueError for exact=True with opponent ranges, which are only sampled.
+        """
+        if exact is True:
+            if self.oppRanges:
+                raise ValueError("Exact enumeration does not support opponent ranges")
+            return True
+        return exact == "auto" and not self.oppRanges and self.countRunouts() <= self.exactThreshold
+
+    def countRunouts(self) -> int:
+        """
+        Returns the number of distinct ways to complete the board and deal the
+        unknown opponent hands. Opponents are interchangeable, so each set of
+        hands is counted once.
+        """
+        numLive = len(self.liveCards)
+        numPairings = 1
+        for i in range(self.numOppDraws):
+            numPairings *= 2 * i + 1
+        return comb(numLive, self.numComDraws) * comb(numLive - self.numComDraws, 2 * self.numOppDraws) * numPairings
+
+    def runExact(self):
+        """
+        Enumerates every completion of the board and every set of unknown
+        opponent hands from the remaining cards, adding each one to the
+        win/loss/tie stats once. wins / numSims is then the exact equity.
+        """
+        self.exact = self.numSims == 0
+        liveCards = sorted(self.liveCards)
+        for drawn in combinations(liveCards, self.numComDraws):
+            board = boardState(self.comIndices + list(drawn))
+            playerStrength = evaluateHole(board, *self.playerIndices)
+            knownBest = max((evaluateHole(board, *hand) for hand in self.knownOppIndices), default=-1)
+            if self.numOppDraws == 0:
+                self.recordOutcome(playerStrength, knownBest)
+                continue
+
+            remaining = [index for index in liveCards if index not in drawn]
+            pairStrengths = {pair: evaluateHole(board, *pair) for pair in combinations(remaining, 2)}
+            for bestOppStrength in self.enumerateOppHands(remaining, self.numOppDraws, pairStrengths, knownBest):
+                self.recordOutcome(playerStrength, bestOppStrength)
+
+    def enumerateOppHands(self, remaining: list[int], numHands: int, pairStrengths: dict, bestSoFar: int, start: int = 0, used: set = None):
+        """
+        Yields the best opponent strength for every set of numHands disjoint
+        hole-card pairs drawn from remaining. Hands are chosen in increasing
+        order of their lowest card so each set is produced exactly once.
+        """
+        if used is None:
+            used = set()
+        if numHands == 0:
+            yield bestSoFar
+            return
+        for i in range(start, len(remaining)):
+            first = remaining[i]
+            if first in used:
+                continue
+            used.add(first)
+            for second in remaining[i + 1:]:
+                if second in used:
+                    continue
+                used.add(second)
+                best = max(bestSoFar, pairStrengths[(first, second)])
+                yield from self.enumerateOppHands(remaining, numHands - 1, pairStrengths, best, i + 1, used)
+                used.discard(second)
+            used.discard(first)
+
+    def runSimsParallel(self, numSims: int, numWorkers: int = None, seed: int = None, executor: Executor = None):
+        """
+        Runs numSims simulation rounds split across a process pool and merges
+        the per-worker wins, ties, losses and winning hand types into this
+        simulation. Each worker gets its own seed derived from seed, so the
+        same seed and worker count always give the same result.
+        An existing executor can be passed in to reuse its worker processes.
+        Raises ValueError if a recorder is attached.
+        """
+        self.checkNoRecorder("runSimsParallel")
+        numWorkers = numWorkers or os.cpu_count() or 1
+        seedRng = random.Random(seed)
+        workerSeeds = [seedRng.getrandbits(64) for _ in range(numWorkers)]
+        shardSizes = [numSims // numWorkers + (1 if i < numSims % numWorkers else 0) for i in range(numWorkers)]
+
+        pool = executor or ProcessPoolExecutor(max_workers=numWorkers)
+        try:
+            futures = [
+                pool.submit(runShard, self.playerHand, self.knownComCards, self.knownOppCards, self.numOpps, shardSize, workerSeed, self.oppRanges, self.getShardClass())
+                for shardSize, workerSeed in zip(shardSizes, workerSeeds) if shardSize
+            ]
+            results = [future.result() for future in futures]
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+        for result in results:
+            self.mergeShardResult(result)
+
+    def runStratified(self, numSims: int, depth: int = 1) -> tuple[float, float, float]:
+        """
+        Runs about numSims rounds stratified over the next depth board cards:
+        every combination of depth live cards is fixed in turn and gets the
+        same number of sampled rounds, so the luck of which cards come next
+        no longer adds variance. The rounds are added to this simulation's
+        stats. Returns (equity, standardError, effectiveSims) of the stratified
+        estimate, where effectiveSims is the number of plain Monte Carlo
+        rounds that would give the same standard error. Each stratum's
+        variance is estimated from its own rounds, so every stratum needs at
+        least two.
+        Raises ValueError with opponent ranges (which make some board cards
+        likelier than others), if fewer than depth board cards are missing,
+        if numSims gives fewer than two rounds per stratum or if a recorder
+        is attached.
+        """
+        self.checkNoRecorder("runStratified")
+        if self.oppRanges:
+            raise ValueError("Stratified sampling does not support opponent ranges")
+        if not 1 <= depth <= self.numComDraws:
+            raise ValueError(f"Cannot stratify over {depth} board cards with {self.numComDraws} still to come")
+        strata = list(combinations(self.liveCards, depth))
+        perStratum = -(-numSims // len(strata))
+        if perStratum < 2:
+            raise ValueError(f"Stratifying over {depth} board cards needs more than {len(strata)} rounds, not {numSims}")
+        equity = variance = 0.0
+        for cards in strata:
+            stratum = self.getShardClass()(self.playerHand, self.knownComCards + [Card.fromIndex(card) for card in cards], self.knownOppCards, self.numOpps, self.rng.getrandbits(64))
+            stratum.runSims(perStratum)
+            self.mergeShardResult((stratum.wins, stratum.ties, stratum.losses, stratum.numSims, stratum.winningOppHands))
+            stratumEquity = stratum.wins / perStratum
+            equity += stratumEquity
+            variance += stratumEquity * (1 - stratumEquity) / (perStratum - 1)
+        equity /= len(strata)
+        variance /= len(strata) ** 2
+        totalSims = perStratum * len(strata)
+        effectiveSims = equity * (1 - equity) / variance if variance else float(totalSims)
+        return equity, sqrt(variance), effectiveSims
+
+    def getShardClass(self) -> type:
+        """
+        Returns the class runShard and runStratified build to run part of
+        this simulation's trials.
+        """
+        return Simulation
+
+    def mergeShardResult(self, result: tuple):
+        """
+        Adds the (wins, ties, losses, numSims, winningOppHands) returned by
+        runShard to this simulation's stats.
+        """
+        wins, ties, losses, numShardSims, winningOppHands = result
+        self.wins += wins
+        self.ties += ties
+        self.losses += losses
+        self.numSims += numShardSims
+        for handStr in winningOppHands:
+            if handStr not in self.winningOppHands:
+                self.winningOppHands.append(handStr)
+
+    def dealTrials(self, count: int) -> array:
+        """
+        Deals the unknown cards for count trials with a partial Fisher-Yates
+        shuffle over the live (unknown) cards. Returns count * dealSize card
+        indices: the missing community cards followed by two cards for each
+        ranged and then each unknown opponent.
+        """
+        if self.rangeCombos:
+            return self.dealRangeTrials(count)
+        liveCards = self.liveCards
+        numLive = len(liveCards)
+        dealSize = self.dealSize
+        rand = self.rng.random
+        deals = array('B')
+        for _ in range(count):
+            for j in range(dealSize):
+                k = j + int(rand() * (numLive - j))
+                liveCards[j], liveCards[k] = liveCards[k], liveCards[j]
+            deals.extend(liveCards[:dealSize])
+        return deals
+
+    def dealRangeTrials(self, count: int) -> array:
+        """
+        dealTrials for simulations with opponent ranges. Each trial first picks
+        the ranged hands and swaps their cards to the front of the live cards,
+        then deals the rest with a partial Fisher-Yates shuffle behind them.
+        """
+        liveCards = self.liveCards
+        numLive = len(liveCards)
+        positions = [0] * 52
+        for position, card in enumerate(liveCards):
+            positions[card] = position
+        numRangeCards = 2 * len(self.rangeCombos)
+        numComEnd = numRangeCards + self.numComDraws
+        dealEnd = self.dealSize
+        rand = self.rng.random
+        deals = array('B')
+        for _ in range(count):
+            j = 0
+            for (combos, _, _), position in zip(self.rangeCombos, self.rangeSampler.sample(self.rng)):
+                for card in combos[position]:
+                    k = positions[card]
+                    other = liveCards[j]
+                    liveCards[j], liveCards[k] = card, other
+                    positions[card], positions[other] = j, k
+                    j += 1
+            for j in range(numRangeCards, dealEnd):
+                k = j + int(rand() * (numLive - j))
+                liveCards[j], liveCards[k] = liveCards[k], liveCards[j]
+                positions[liveCards[j]], positions[liveCards[k]] = j, k
+            deals.extend(liveCards[numRangeCards:numComEnd])
+            deals.extend(liveCards[:numRangeCards])
+            deals.extend(liveCards[numComEnd:dealEnd])
+        return deals
+
+    def scoreTrials(self, deals: array, count: int):
+        """
+        Evaluates every hand of count dealt trials (see evaluateTrials)
+        and tallies wins, ties and losses.
+        """
+        strengths = self.evaluateTrials(deals, count)
+        handsPerTrial = 1 + self.numOpps
+        recordOutcome = self.recordOutcome
+        for start in range(0, count * handsPerTrial, handsPerTrial):
+            recordOutcome(strengths[start], max(strengths[start + 1:start + handsPerTrial]))
+        if self.recorder is not None:
+            self.recordDeals(deals, count, strengths)
+
+    def recordDeals(self, deals: array, count: int, strengths: list[int]):
+        """
+        Writes count dealt trials to the recorder as packed records: the board,
+        the player's and known opponents' hands, the dealt opponent hands and
+        the outcome byte.
+        """
+        dealSize = self.dealSize
+        numComDraws = self.numComDraws
+        handsPerTrial = 1 + self.numOpps
+        comBytes = bytes(self.comIndices)
+        knownHandBytes = self.knownHandBytes
+        records = bytearray()
+        for trial in range(count):
+            start = trial * dealSize
+            first = trial * handsPerTrial
+            records += comBytes
+            records += deals[start:start + numComDraws]
+            records += knownHandBytes
+            records += deals[start + numComDraws:start + dealSize]
+            records.append(outcomeOf(strengths[first], max(strengths[first + 1:first + handsPerTrial])))
+        self.recorder.write(records)
+
+    def evaluateTrials(self, deals: array, count: int) -> list[int]:
+        """
+        Returns the strengths of every hand of count dealt trials: for each
+        trial the player's hand, then the known, ranged and unknown opponents.
+        Each trial's board is preprocessed once with boardState and every
+        hand is then scored from its two hole cards.
+        """
+        dealSize = self.dealSize
+        numComDraws = self.numComDraws
+        comIndices = self.comIndices
+        knownHands = [self.playerIndices] + self.knownOppIndices
+        strengths = []
+        append = strengths.append
+        for start in range(0, count * dealSize, dealSize):
+            board = boardState(comIndices + deals[start:start + numComDraws].tolist())
+            for first, second in knownHands:
+                append(evaluateHole(board, first, second))
+            for j in range(start + numComDraws, start + dealSize, 2):
+                append(evaluateHole(board, deals[j], deals[j + 1]))
+        return strengths
+
+class TableSimulation(Simulation):
+    """
+    Simulates a table where several players' hands are known and computes
+    every known player's outcome from the same runouts, instead of running
+    one Simulation per player. Unknown seats get random hands.
+    The inherited wins/ties/losses stats describe the first hand.
+    Runs are sampled in this process only: exact, parallel, asynchronous and
+    stratified runs and compareSimulations raise ValueError.
+    """
+
+    def __init__(self, hands: list[list[Card]], knownComCards: list[Card] = [], numUnknown: int = 0, seed: int = None, instrument: bool = False):
+        """
+        Initializes the table with the known hands (one per seat), any known
+        community cards and the number of seats whose hands are unknown.
+        """
+        super().__init__(hands[0], knownComCards, hands[1:], len(hands) - 1 + numUnknown, seed, instrument=instrument)
+        self.hands = hands
+        self.seatWins = [0] * len(hands)
+        self.seatTies = [0] * len(hands)
+        self.seatLosses = [0] * len(hands)
+        self.seatShares = [0.0] * len(hands) #Pots won, with split pots counted fractionally
+
+    def runSim(self):
+        """
+        Runs a single simulation round for every seat.
+        """
+        self.runSims(1)
+
+    def useExact(self, exact: bool | str) -> bool:
+        """
+        Tables are always sampled. Raises ValueError for exact=True.
+        """
+        if exact is True:
+            raise ValueError("Exact enumeration is not supported for TableSimulation")
+        return False
+
+    def runUntil(self, precision: float = 0.005, confidence: float = 0.95, timeLimit: float = None, maxSims: int = None, batchSize: int = 2000):
+        """
+        Runs batches until the first hand's equity reaches the precision target,
+        timeLimit or maxSims (see Simulation.runUntil). The cache and the
+        preflop table are not used, since they only hold one seat's result.
+        """
+        return super().runUntil(precision, confidence, timeLimit, maxSims, batchSize, exact=False, usePreflopTable=False)
+
+    def runSimsParallel(self, numSims: int, numWorkers: int = None, seed: int = None, executor: Executor = None):
+        """
+        Not supported: shards only return the first seat's stats.
+        Raises ValueError.
+        """
+        raise ValueError("Parallel runs are not supported for TableSimulation")
+
+    async def iterSimsAsync(self, batchSize: int = 20000, maxSims: int = None, precision: float = None, confidence: float = 0.95, executor: Executor = None) -> AsyncIterator[tuple[float, tuple[float, float], int]]:
+        """
+        Not supported: shards only return the first seat's stats.
+        Raises ValueError.
+        """
+        raise ValueError("Asynchronous runs are not supported for TableSimulation")
+        yield
+
+    async def runUntilAsync(self, precision: float = 0.005, confidence: float = 0.95, timeLimit: float = None, maxSims: int = None, batchSize: int = 20000, executor: Executor = None) -> tuple[float, float, int]:
+        """
+        Not supported: shards only return the first seat's stats.
+        Raises ValueError.
+        """
+        raise ValueError("Asynchronous runs are not supported for TableSimulation")
+
+    def runStratified(self, numSims: int, depth: int = 1) -> tuple[float, float, float]:
+        """
+        Not supported: strata only return the first seat's stats.
+        Raises ValueError.
+        """
+        raise ValueError("Stratified sampling is not supported for TableSimulation")
+
+    def scoreTrials(self, deals: array, count: int):
+        """
+        Evaluates every seat of count dealt trials (see evaluateTrials)
+        and tallies each known seat's wins, ties, losses and pot share.
+        """
+        strengths = self.evaluateTrials(deals, count)
+        numSeats = len(self.hands)
+        seatRange = range(numSeats)
+        seatWins, seatTies, seatLosses, seatShares = self.seatWins, self.seatTies, self.seatLosses, self.seatShares
+        handsPerTrial = 1 + self.numOpps
+        for start in range(0, count * handsPerTrial, handsPerTrial):
+            trialStrengths = strengths[start:start + handsPerTrial]
+            best = max(trialStrengths)
+            numWinners = trialStrengths.count(best)
+            for seat in seatRange:
+                if trialStrengths[seat] != best:
+                    seatLosses[seat] += 1
+                    continue
+                if numWinners == 1:
+                    seatWins[seat] += 1
+                else:
+                    seatTies[seat] += 1
+                seatShares[seat] += 1 / numWinners
+            self.recordOutcome(trialStrengths[0], max(trialStrengths[1:]))
+
+    def getSeatOutcomes(self) -> list[tuple[int, int, int]]:
+        """
+        Returns (wins, ties, losses) for every known seat.
+        """
+        return list(zip(self.seatWins, self.seatTies, self.seatLosses))
+
+    def getSeatEquities(self) -> list[float]:
+        """
+        Returns every known seat's equity as its average share of the pot.
+        """
+        return [share / self.numSims if self.numSims else 0.0 for share in self.seatShares]
+
+class OmahaSimulation(Simulation):
+    """
+    Simulates Omaha: every player has four hole cards and must use exactly two
+    of them with three board cards. Unknown opponents get four random cards.
+    Each trial's board is preprocessed into its ten three-card subsets once,
+    known hands into their six hole pairs once per simulation, so a hand costs
+    60 table lookups (see Evaluator.evaluateOmaha).
+    """
+
+    def __init__(self, playerHand: list[Card], knownComCards: list[Card] = [], knownOppCards: list[list[Card]] = [], numOpps: int = 8, seed: int = None, oppRanges: list[HandRange] = [], instrument: bool = False):
+        """
+        Initializes the simulation like Simulation, with four-card hands.
+        Raises ValueError for hands that are not four cards or for opponent
+        ranges, which only describe two-card hands.
+        """
+        if len(playerHand) != 4 or any(len(hand) != 4 for hand in knownOppCards):
+            raise ValueError("Omaha hands must have four cards")
+        if oppRanges:
+            raise ValueError("Opponent ranges are not supported for OmahaSimulation")
+        super().__init__(playerHand, knownComCards, knownOppCards, numOpps, seed, instrument=instrument)
+        self.dealSize = self.numComDraws + 4 * self.numOppDraws
+        self.knownHoleStates = [omahaHoleState(self.playerIndices)] + [omahaHoleState(hand) for hand in self.knownOppIndices]
+
+    def runSim(self):
+        """
+        Runs a single simulation round.
+        """
+        self.runSims(1)
+
+    def useExact(self, exact: bool | str) -> bool:
+        """
+        Omaha is always sampled. Raises ValueError for exact=True.
+        """
+        if exact is True:
+            raise ValueError("Exact enumeration is not supported for OmahaSimulation")
+        return False
+
+    def loadPreflopEquity(self, table: PreflopTable = None) -> bool:
+        """
+        The preflop equity table holds Hold'em hands only, so it never answers.
+        """
+        return False
+
+    def getShardClass(self) -> type:
+        """
+        Returns OmahaSimulation, so worker shards deal four-card hands too.
+        """
+        return OmahaSimulation
+
+    def evaluateTrials(self, deals: array, count: int) -> list[int]:
+        """
+        Returns the Omaha strengths of every hand of count dealt trials, laid
+        out like Simulation.evaluateTrials with four cards per dealt opponent.
+        """
+        dealSize = self.dealSize
+        numComDraws = self.numComDraws
+        comIndices = self.comIndices
+        knownHoleStates = self.knownHoleStates
+        strengths = []
+        append = strengths.append
+        for start in range(0, count * dealSize, dealSize):
+            board = omahaBoardState(comIndices + deals[start:start + numComDraws].tolist())
+            for holeState in knownHoleStates:
+                append(evaluateOmaha(board, holeState))
+            for j in range(start + numComDraws, start + dealSize, 4):
+                append(evaluateOmaha(board, omahaHoleState(deals[j:j + 4])))
+        return strengths
+
+def runShard(playerHand: list[Card], knownComCards: list[Card], knownOppCards: list[list[Card]], numOpps: int, numSims: int, seed: int, oppRanges: list[HandRange] = [], simClass: type = None):
+    """
+    Worker entry point for runSimsParallel. Runs one seeded shard of trials
+    with simClass (default Simulation) and returns its (wins, ties, losses,
+    numSims, winningOppHands).
+    """
+    sim = (simClass or Simulation)(playerHand, knownComCards, knownOppCards, numOpps, seed, oppRanges=oppRanges)
+    sim.runSims(numSims)
+    return sim.wins, sim.ties, sim.losses, sim.numSims, sim.winningOppHands
+
+def runExactShard(playerHand: list[Card], knownComCards: list[Card], knownOppCards: list[list[Card]], numOpps: int):
+    """
+    Worker entry point for exact queries. Enumerates every runout (see runExact)
+    and returns its (wins, ties, losses, numSims, winningOppHands).
+    """
+    sim = Simulation(playerHand, knownComCards, knownOppCards, numOpps)
+    sim.runExact()
+    return sim.wins, sim.ties, sim.losses, sim.numSims, sim.winningOppHands
+
+def compareSimulations(sims: list[Simulation], numSims: int, seed: int = None) -> list[tuple[float, float, float]]:
+    """
+    Runs numSims rounds of every simulation with common random numbers: each
+    round draws one random ordering of the deck, and every simulation deals
+    its board and unknown opponents from that ordering, skipping its own known
+    cards. Each simulation still sees a uniformly random deal, but runouts are
+    shared wherever the known cards allow, so differences between hero hands
+    (or between numOpps for the same hand) have much lower variance.
+    The rounds are added to every simulation's stats. Returns, for each
+    simulation after the first, (equity difference from sims[0], standard
+    error of the difference, effectiveSims) where effectiveSims is the number
+    of independent rounds per simulation that would give the same standard error.
+    Raises ValueError for simulations with opponent ranges or a recorder,
+    and for TableSimulations, whose other seats would not be scored.
+    """
+    for sim in sims:
+        sim.checkNoRecorder("compareSimulations")
+    if any(sim.oppRanges for sim in sims):
+        raise ValueError("Common random numbers do not support opponent ranges")
+    if any(isinstance(sim, TableSimulation) for sim in sims):
+        raise ValueError("Common random numbers do not support TableSimulation")
+    rng = random.Random(seed)
+    liveSets = [set(sim.liveCards) for sim in sims]
+    prefixSize = max(sim.dealSize + 52 - len(sim.liveCards) for sim in sims)
+    winSums = [0] * len(sims)
+    pairSums = [0] * len(sims)
+    squaredSums = [0] * len(sims)
+    remaining = numSims
+    while remaining > 0:
+        count = min(remaining, simBatchSize)
+        orders = [rng.sample(range(52), prefixSize) for _ in range(count)]
+        wins = []
+        for sim, live in zip(sims, liveSets):
+            dealSize = sim.dealSize
+            deals = array('B')
+            for order in orders:
+                deals.extend([card for card in order if card in live][:dealSize])
+            strengths = sim.evaluateTrials(deals, count)
+            handsPerTrial = 1 + sim.numOpps
+            trialWins = []
+            for start in range(0, count * handsPerTrial, handsPerTrial):
+                bestOppStrength = max(strengths[start + 1:start + handsPerTrial])
+                sim.recordOutcome(strengths[start], bestOppStrength)
+                trialWins.append(strengths[start] > bestOppStrength)
+            wins.append(trialWins)
+        for i, trialWins in enumerate(wins):
+            winSums[i] += sum(trialWins)
+            differences = [win - baseWin for win, baseWin in zip(trialWins, wins[0])]
+            pairSums[i] += sum(differences)
+            squaredSums[i] += sum(difference * difference for difference in differences)
+        remaining -= count
+
+    results = []
+    baseEquity = winSums[0] / numSims
+    for i in range(1, len(sims)):
+        difference = pairSums[i] / numSims
+        variance = (squaredSums[i] / numSims - difference * difference) / numSims
+        equity = winSums[i] / numSims
+        independentVariance = (equity * (1 - equity) + baseEquity * (1 - baseEquity)) / numSims
+        effectiveSims = numSims * independentVariance / variance if variance else float(numSims)
+        results.append((difference, sqrt(variance), effectiveSims))
+    return results